@@ -0,0 +1,279 @@
+"""
+Registry of paper-trading agents hosted by one backend
+Agents are keyed by id and kept in memory up to a bound, least recently
+used first out; idle or overflow agents are saved to disk and loaded back
+on their next request. Agents checked out by a request are never evicted.
+Saves and loads happen outside the registry lock, so one slow write or
+cold load doesn't hold up every other agent's requests.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from llm_client import LLMClient, MistralLLMClient, fake_client_from_env
+from trade_store import TradeStore
+from trading_agent import TradingAgent
+
+AGENT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class AgentExistsError(ValueError):
+    """An agent with that id is already registered"""
+
+
+class AgentRegistry:
+    """Agents by id with a bounded resident set and eviction to disk"""
+
+    def __init__(self, state_dir: str, max_resident: int = 64, idle_seconds: float = 600.0, trade_store: Optional[TradeStore] = None):
+        self.state_dir = state_dir
+        # Full trade/decision history lives here; agents keep only recent trades in memory
+        self.trade_store = trade_store
+        self.max_resident = max_resident
+        self.idle_seconds = idle_seconds
+
+        self._agents: "OrderedDict[str, TradingAgent]" = OrderedDict()  # least recently used first
+        self._last_used: Dict[str, float] = {}
+        self._leases: Dict[str, int] = {}
+        self._saving: Dict[str, TradingAgent] = {}  # evicted, state still being written
+        self._loading: Dict[str, Future] = {}  # being read back from disk, for other checkouts to wait on
+        self._lock = threading.RLock()
+        # One LLM client per API key, shared by every agent using it
+        self._clients: Dict[str, LLMClient] = {}
+        # Each agent's client, so one created with its own key keeps it across eviction
+        # (kept in memory only - keys are never written to the saved state)
+        self._agent_clients: Dict[str, Optional[LLMClient]] = {}
+
+        self.loads = 0
+        self.evictions = 0
+
+    def create(self, agent_id: str, name: str, initial_balance: float, api_key: Optional[str] = None, replace: bool = False) -> TradingAgent:
+        """Create an agent; ValueError if the id is invalid or taken (unless replace)"""
+        self._check_id(agent_id)
+        with self._lock:
+            if not replace and self.exists(agent_id):
+                raise AgentExistsError(f"Agent '{agent_id}' already exists")
+
+            client = self._client_for(api_key)
+            agent = TradingAgent(name=name, initial_balance=initial_balance, llm_client=client)
+            if self.trade_store:
+                self.trade_store.delete_agent(agent_id)
+                agent.attach_trade_store(self.trade_store, agent_id)
+            self._saving.pop(agent_id, None)
+            self._loading.pop(agent_id, None)
+            self._agent_clients[agent_id] = client
+            self._agents[agent_id] = agent
+            self._agents.move_to_end(agent_id)
+            self._last_used[agent_id] = time.monotonic()
+            evicted = self._evict_overflow()
+        self._save(agent_id, agent)
+        self._save_evicted(evicted)
+        return agent
+
+    def checkout(self, agent_id: str) -> TradingAgent:
+        """The agent for a request, loading it from disk if needed; KeyError if unknown
+
+        Every checkout must be paired with release().
+        """
+        self._check_id(agent_id, KeyError)
+        while True:
+            with self._lock:
+                agent = self._agents.get(agent_id)
+                if agent is None:
+                    agent = self._saving.pop(agent_id, None)
+                    if agent is not None:
+                        # Evicted but not yet written out - the object in memory is the latest state
+                        self._agents[agent_id] = agent
+                if agent is not None:
+                    self._agents.move_to_end(agent_id)
+                    self._last_used[agent_id] = time.monotonic()
+                    self._leases[agent_id] = self._leases.get(agent_id, 0) + 1
+                    evicted = self._evict_overflow()
+                    break
+
+                loading = self._loading.get(agent_id)
+                loader = loading is None
+                if loader:
+                    loading = self._loading[agent_id] = Future()
+                    client = self._client_for_agent(agent_id)
+
+            # Not resident: one checkout reads it from disk, any others wait for that
+            if loader:
+                self._load(agent_id, loading, client)
+            else:
+                loading.result()
+        self._save_evicted(evicted)
+        return agent
+
+    def release(self, agent_id: str):
+        with self._lock:
+            leases = self._leases.get(agent_id, 0) - 1
+            if leases > 0:
+                self._leases[agent_id] = leases
+            else:
+                self._leases.pop(agent_id, None)
+
+    def delete(self, agent_id: str):
+        """Tear an agent down and remove its saved state; KeyError if unknown"""
+        self._check_id(agent_id, KeyError)
+        with self._lock:
+            if not self.exists(agent_id):
+                raise KeyError(agent_id)
+            self._agents.pop(agent_id, None)
+            self._saving.pop(agent_id, None)
+            self._loading.pop(agent_id, None)
+            self._agent_clients.pop(agent_id, None)
+            self._last_used.pop(agent_id, None)
+            self._leases.pop(agent_id, None)
+            try:
+                os.remove(self._path(agent_id))
+            except FileNotFoundError:
+                pass
+            if self.trade_store:
+                self.trade_store.delete_agent(agent_id)
+
+    def exists(self, agent_id: str) -> bool:
+        with self._lock:
+            return agent_id in self._agents or agent_id in self._saving or os.path.exists(self._path(agent_id))
+
+    def list(self) -> List[Dict]:
+        """Every known agent id and whether it's resident in memory"""
+        with self._lock:
+            ids = set(self._agents) | set(self._saving)
+            if os.path.isdir(self.state_dir):
+                ids.update(name[:-5] for name in os.listdir(self.state_dir) if name.endswith(".json"))
+            return [{"agent_id": agent_id, "resident": agent_id in self._agents} for agent_id in sorted(ids)]
+
+    def evict_idle(self) -> int:
+        """Save and unload agents idle for longer than idle_seconds; returns how many"""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [
+                agent_id for agent_id in self._agents
+                if self._last_used.get(agent_id, 0) < cutoff and not self._leases.get(agent_id)
+            ]
+            evicted = [self._evict(agent_id) for agent_id in idle]
+        self._save_evicted(evicted)
+        return len(evicted)
+
+    def flush(self):
+        """Save every resident agent (e.g. on shutdown)"""
+        with self._lock:
+            resident = list(self._agents.items())
+        for agent_id, agent in resident:
+            self._save(agent_id, agent)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident": len(self._agents),
+                "max_resident": self.max_resident,
+                "checked_out": sum(1 for leases in self._leases.values() if leases),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "idle_seconds": self.idle_seconds,
+            }
+
+    def _load(self, agent_id: str, loading: Future, client: Optional[LLMClient]):
+        """Bring an evicted agent back from disk (without the lock held), then make it resident
+
+        Resolves loading when done; if the agent was deleted or replaced meanwhile the
+        loaded copy is dropped and the checkout looks again.
+        """
+        try:
+            path = self._path(agent_id)
+            if not os.path.exists(path):
+                raise KeyError(agent_id)
+            agent = TradingAgent(name=agent_id, initial_balance=0, llm_client=client)
+            agent.load_state(path)
+            if self.trade_store:
+                agent.attach_trade_store(self.trade_store, agent_id)
+        except BaseException as e:
+            with self._lock:
+                if self._loading.get(agent_id) is loading:
+                    del self._loading[agent_id]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            if self._loading.get(agent_id) is loading:
+                del self._loading[agent_id]
+                self._agents[agent_id] = agent
+                self.loads += 1
+        loading.set_result(None)
+
+    def _client_for_agent(self, agent_id: str) -> Optional[LLMClient]:
+        """The client an agent was created with (caller holds the lock)"""
+        if agent_id not in self._agent_clients:
+            # Saved by an earlier run of the server - its own key (if any) wasn't kept
+            self._agent_clients[agent_id] = self._client_for(None)
+        return self._agent_clients[agent_id]
+
+    def _evict_overflow(self) -> List[Tuple[str, TradingAgent]]:
+        """Unload least recently used agents past max_resident (caller holds the lock)
+
+        Returns the evicted agents for the caller to pass to _save_evicted() once it
+        has released the lock.
+        """
+        overflow = len(self._agents) - self.max_resident
+        evicted = []
+        for agent_id in list(self._agents):
+            if overflow <= 0:
+                break
+            if not self._leases.get(agent_id):
+                evicted.append(self._evict(agent_id))
+                overflow -= 1
+        return evicted
+
+    def _evict(self, agent_id: str) -> Tuple[str, TradingAgent]:
+        """Unload an agent, keeping it reachable until it's saved (caller holds the lock)"""
+        agent = self._agents.pop(agent_id)
+        self._last_used.pop(agent_id, None)
+        self._saving[agent_id] = agent
+        self.evictions += 1
+        return agent_id, agent
+
+    def _save_evicted(self, evicted: List[Tuple[str, TradingAgent]]):
+        """Write out evicted agents (without the lock held)"""
+        for agent_id, agent in evicted:
+            self._save(agent_id, agent)
+            with self._lock:
+                if self._saving.get(agent_id) is agent:
+                    del self._saving[agent_id]
+                elif agent_id not in self._agents:
+                    # Deleted while it was being written - don't leave its state behind
+                    try:
+                        os.remove(self._path(agent_id))
+                    except FileNotFoundError:
+                        pass
+
+    def _save(self, agent_id: str, agent: TradingAgent):
+        os.makedirs(self.state_dir, exist_ok=True)
+        agent.save_state(self._path(agent_id))
+
+    def _client_for(self, api_key: Optional[str]) -> Optional[LLMClient]:
+        """Shared LLM client for an API key (the server's key when none is given)"""
+        if os.getenv("LLM_PROVIDER", "").lower() == "fake":
+            api_key = "fake"
+        else:
+            api_key = api_key or os.getenv("MISTRAL_API_KEY", "")
+        if not api_key:
+            return None
+
+        client = self._clients.get(api_key)
+        if client is None:
+            client = fake_client_from_env(os.environ) if api_key == "fake" else MistralLLMClient(api_key=api_key)
+            self._clients[api_key] = client
+        return client
+
+    def _path(self, agent_id: str) -> str:
+        return os.path.join(self.state_dir, f"{agent_id}.json")
+
+    @staticmethod
+    def _check_id(agent_id: str, error=ValueError):
+        if not AGENT_ID_PATTERN.match(agent_id):
+            raise error(f"Invalid agent id '{agent_id}' (letters, digits, '-' and '_', up to 64)")
@@ -0,0 +1,287 @@
+"""
+Async Market Data Service
+Same sources, fallback order and local bar store as MarketDataService, for use from an event loop:
+1. Alpha Vantage over a shared, pooled httpx.AsyncClient (keep-alive, per-host limits)
+2. Yahoo Finance in a bounded thread pool (yfinance is blocking)
+3. Stale bars from the bar store, then simulated data (last resort)
+Stored symbols only fetch bars newer than the last stored one; store file I/O
+runs in the thread pool.
+"""
+
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from market_data_service import MarketDataService
+from rate_limiter import PRIORITY_CHART, PRIORITY_HELD
+from source_router import SourceSkipped
+
+
+class AsyncMarketDataService:
+    """Fetches market data concurrently from one event loop"""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_connections_per_host: int = 8,
+        request_timeout: float = 10.0,
+        deadline: float = 15.0,
+        max_workers: int = 4
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.request_timeout = request_timeout
+        self.deadline = deadline
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits = {}  # {host: asyncio.Semaphore}
+        self._inflight = {}  # {cache key: asyncio.Future}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close pooled connections and the worker pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
+
+    async def get_market_data(self, symbol: str, period: str = "1mo", interval: str = "1d", priority: int = PRIORITY_CHART) -> Dict:
+        """Get market data - served from the shared cache when fresh, otherwise fetched within the deadline"""
+        cache = MarketDataService.cache
+        key = (symbol, period, interval)
+        return await self._get_or_load(
+            key,
+            lambda: self._fetch_market_data(symbol, period, interval, priority),
+            cache.ttl_for(interval)
+        )
+
+    async def get_market_data_many(self, symbols: List[str], period: str = "1mo", interval: str = "1d", priority: int = PRIORITY_CHART) -> Dict[str, Dict]:
+        """Get market data for several symbols concurrently, keyed by symbol"""
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self.get_market_data(symbol, period, interval, priority) for symbol in symbols))
+        return dict(zip(symbols, results))
+
+    async def get_market_data_batch(self, symbols: List[str], period: str = "1mo", interval: str = "1d", priority: int = PRIORITY_CHART) -> Dict[str, Dict]:
+        """Get market data for a whole universe, keyed by symbol - cache misses share bulk downloads
+
+        Runs MarketDataService.get_market_data_batch in the worker pool, so a refresh is one
+        chunked multi-symbol download instead of one download per symbol.
+        """
+        return await self._run_blocking(MarketDataService.get_market_data_batch, list(dict.fromkeys(symbols)), period, interval, priority)
+
+    async def get_quote(self, symbol: str, priority: int = PRIORITY_HELD) -> Dict:
+        """Get the latest mark price for a symbol without downloading its history"""
+        cache = MarketDataService.cache
+        return await self._get_or_load(
+            (symbol, "quote", "quote"),
+            lambda: self._fetch_quote(symbol, priority),
+            cache.ttl_for("quote")
+        )
+
+    async def get_quotes(self, symbols: List[str], priority: int = PRIORITY_HELD) -> Dict[str, Dict]:
+        """Get latest quotes for several symbols concurrently, keyed by symbol"""
+        symbols = list(dict.fromkeys(symbols))
+        quotes = await asyncio.gather(*(self.get_quote(symbol, priority) for symbol in symbols))
+        return dict(zip(symbols, quotes))
+
+    async def try_alpha_vantage(self, symbol: str, period: str = "1mo", interval: str = "1d", priority: int = PRIORITY_CHART) -> Optional[Dict]:
+        """Fetch a time series from Alpha Vantage over the pooled client"""
+        try:
+            return await self._alpha_vantage_fetch(symbol, period, interval, priority)
+        except SourceSkipped:
+            return None
+        except Exception as e:
+            print(f"Alpha Vantage request failed: {e}")
+            return None
+
+    async def try_alpha_vantage_quote(self, symbol: str, priority: int = PRIORITY_HELD) -> Optional[Dict]:
+        """Fetch just the latest quote from Alpha Vantage over the pooled client"""
+        try:
+            return await self._alpha_vantage_quote_fetch(symbol, priority)
+        except SourceSkipped:
+            return None
+        except Exception as e:
+            print(f"Alpha Vantage quote failed: {e}")
+            return None
+
+    async def _alpha_vantage_fetch(self, symbol: str, period: str, interval: str, priority: int) -> Optional[Dict]:
+        """Alpha Vantage time series request - errors and skips as in MarketDataService._alpha_vantage_fetch"""
+        api_key = os.getenv("ALPHA_VANTAGE_KEY")
+
+        if not api_key:
+            raise SourceSkipped("ALPHA_VANTAGE_KEY not set")
+
+        if not await MarketDataService.alpha_vantage_limiter.acquire_async(priority):
+            print(f"Alpha Vantage budget spent, skipping to next source for {symbol}")
+            raise SourceSkipped("Alpha Vantage budget spent")
+
+        params = MarketDataService._alpha_vantage_params(symbol, period, interval, api_key)
+        data = await self._get_json(MarketDataService.ALPHA_VANTAGE_URL, params)
+        return MarketDataService._parse_alpha_vantage(symbol, data, period, interval)
+
+    async def _alpha_vantage_quote_fetch(self, symbol: str, priority: int) -> Optional[Dict]:
+        """Alpha Vantage GLOBAL_QUOTE request - errors and skips as in MarketDataService._alpha_vantage_fetch"""
+        api_key = os.getenv("ALPHA_VANTAGE_KEY")
+
+        if not api_key:
+            raise SourceSkipped("ALPHA_VANTAGE_KEY not set")
+
+        if not await MarketDataService.alpha_vantage_limiter.acquire_async(priority):
+            print(f"Alpha Vantage budget spent, skipping to next source for {symbol}")
+            raise SourceSkipped("Alpha Vantage budget spent")
+
+        params = {"function": "GLOBAL_QUOTE", "symbol": symbol, "apikey": api_key}
+        data = await self._get_json(MarketDataService.ALPHA_VANTAGE_URL, params)
+        return MarketDataService._parse_alpha_vantage_quote(symbol, data)
+
+    async def _fetch_market_data(self, symbol: str, period: str, interval: str, priority: int = PRIORITY_CHART) -> Dict:
+        """Try the bar store and real sources healthiest first within the deadline, then fall back to simulated data"""
+        print(f"📊 Fetching market data for {symbol} ({interval} interval)...")
+
+        store = MarketDataService.bar_store
+        if store is not None:
+            data = await self._fetch_with_store(store, symbol, period, interval, priority)
+        else:
+            data = await self._fetch_real_data(symbol, period, interval, priority)
+        if data:
+            return data
+
+        print(f"⚠️  All real data sources unavailable, generating simulated data for {symbol}")
+        start = time.perf_counter()
+        data = await self._run_blocking(MarketDataService.generate_realistic_data, symbol, period, interval)
+        MarketDataService.router.log_served(data, symbol, "simulated", time.perf_counter() - start)
+        return data
+
+    async def _fetch_real_data(self, symbol: str, period: str, interval: str, priority: int = PRIORITY_CHART) -> Optional[Dict]:
+        """Fetch a full period window from the healthiest real source, or None"""
+        data = await self._route(symbol, {
+            "alpha_vantage": lambda: self._alpha_vantage_fetch(symbol, period, interval, priority),
+            "yahoo_finance": lambda: self._run_blocking(MarketDataService._yahoo_finance_fetch, symbol, period, interval),
+        })
+        if data:
+            print(f"✅ Got real data from {data['data_source']} for {symbol} in {data['source_latency_ms']:.0f}ms")
+        return data
+
+    async def _fetch_new_bars(self, symbol: str, interval: str, last_ts: int, priority: int = PRIORITY_CHART) -> Optional[Dict]:
+        """Fetch only the most recent bars from the healthiest real source, or None"""
+        compact_period = MarketDataService._compact_period(interval)
+        start = MarketDataService._start_after(last_ts, interval)
+        return await self._route(symbol, {
+            "alpha_vantage": lambda: self._alpha_vantage_fetch(symbol, compact_period, interval, priority),
+            "yahoo_finance": lambda: self._run_blocking(MarketDataService._yahoo_finance_fetch, symbol, interval=interval, start=start),
+        })
+
+    async def _fetch_with_store(self, store, symbol: str, period: str, interval: str, priority: int = PRIORITY_CHART) -> Optional[Dict]:
+        """Event-loop version of MarketDataService._fetch_with_store"""
+        meta = await self._run_blocking(store.meta, symbol, interval)
+
+        if store.covers(meta, period):
+            data = await self._fetch_new_bars(symbol, interval, meta["last_ts"], priority)
+            result = await self._run_blocking(MarketDataService._append_to_store, store, symbol, period, interval, meta, data)
+            if result:
+                return result
+
+        data = await self._fetch_real_data(symbol, period, interval, priority)
+        if data:
+            await self._run_blocking(MarketDataService._save_to_store, store, symbol, period, interval, data)
+            return data
+
+        return await self._run_blocking(MarketDataService._serve_stored, store, symbol, period, interval, meta)
+
+    async def _fetch_quote(self, symbol: str, priority: int = PRIORITY_HELD) -> Dict:
+        """Try real quote sources healthiest first within the deadline, then fall back to a simulated quote"""
+        quote = await self._route(symbol, {
+            "alpha_vantage": lambda: self._alpha_vantage_quote_fetch(symbol, priority),
+            "yahoo_finance": lambda: self._run_blocking(MarketDataService._yahoo_quote_fetch, symbol),
+        })
+        if quote:
+            return quote
+
+        return await self._run_blocking(MarketDataService._simulated_quote, symbol)
+
+    async def _route(self, symbol: str, fetches: Dict) -> Optional[Dict]:
+        """Async counterpart of SourceRouter.route, bounded by the overall deadline"""
+        router = MarketDataService.router
+        try:
+            async with asyncio.timeout(self.deadline):
+                for source in router.order(fetches.keys()):
+                    start = time.perf_counter()
+                    result = await router.call_async(source, fetches[source])
+                    if result:
+                        router.log_served(result, symbol, source, time.perf_counter() - start)
+                        return result
+        except TimeoutError:
+            print(f"⏱️  Real data sources missed the {self.deadline:.0f}s deadline for {symbol}")
+        return None
+
+    async def _get_or_load(self, key, loader, ttl: float):
+        """Shared-cache lookup with single-flight loading on this event loop"""
+        cache = MarketDataService.cache
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            cache.note_coalesced()
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            if value is not None:
+                cache.put(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so an unawaited future doesn't log it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        """GET a JSON document, holding one of the per-host connection slots"""
+        client = self._get_client()
+        host = urlsplit(url).hostname
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        async with limit:
+            response = await client.get(url, params=params)
+        return response.json()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.request_timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0
+                )
+            )
+        return self._client
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking call in the bounded worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
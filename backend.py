@@ -1,16 +1,76 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
+import functools
 import uvicorn
+import json
+import uuid
+from agent_registry import AgentExistsError, AgentRegistry
+from trade_store import TradeStore
 from trading_agent import TradingAgent
+from market_data_service import MarketDataService
+from async_market_data_service import AsyncMarketDataService
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="Trading Agent API")
+# Non-blocking market data for the routes (pooled HTTP, deadlines, shared cache)
+market_data_service = AsyncMarketDataService()
+
+# Blocking work (file I/O, LLM token streams) runs here rather than on the event loop
+# or Starlette's shared threadpool
+blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BACKEND_BLOCKING_WORKERS", "16")),
+    thread_name_prefix="backend-blocking"
+)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the dedicated executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(fn, *args, **kwargs))
+
+
+# Every agent's trade and decision history, paged from SQLite rather than held in memory
+trade_store = TradeStore(os.getenv("TRADE_HISTORY_DB", "trade_history.db"))
+
+# Agents by id; least recently used and idle agents are saved to disk and unloaded
+registry = AgentRegistry(
+    state_dir=os.getenv("AGENT_STATE_DIR", ".agents"),
+    max_resident=int(os.getenv("AGENT_MAX_RESIDENT", "64")),
+    idle_seconds=float(os.getenv("AGENT_IDLE_SECONDS", "600")),
+    trade_store=trade_store
+)
+DEFAULT_AGENT_ID = "default"
+
+
+async def evict_idle_agents():
+    while True:
+        await asyncio.sleep(60)
+        evicted = await run_blocking(registry.evict_idle)
+        if evicted:
+            print(f"💤 Evicted {evicted} idle agent(s) to disk")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    evictor = asyncio.create_task(evict_idle_agents())
+    yield
+    evictor.cancel()
+    await run_blocking(registry.flush)
+    trade_store.close()
+    await market_data_service.aclose()
+    blocking_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="Trading Agent API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -21,15 +81,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global agent instance
-agent: Optional[TradingAgent] = None
-
 # Request models
 class InitializeAgentRequest(BaseModel):
     name: str
     initial_balance: float
     api_key: Optional[str] = None
 
+class CreateAgentRequest(InitializeAgentRequest):
+    agent_id: Optional[str] = None
+
 class TradeRequest(BaseModel):
     symbol: str
 
@@ -38,132 +98,308 @@ class ManualTradeRequest(BaseModel):
     action: str
     quantity: int
 
+
+async def checkout(agent_id: str) -> TradingAgent:
+    """Check an agent out of the registry; pair with release()"""
+    try:
+        return await run_blocking(registry.checkout, agent_id)
+    except KeyError:
+        if agent_id == DEFAULT_AGENT_ID:
+            raise HTTPException(status_code=400, detail="Agent not initialized")
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+
+async def release(agent_id: str):
+    """Return a checked-out agent; finishes even if the request is cancelled meanwhile"""
+    await asyncio.shield(run_blocking(registry.release, agent_id))
+
+@asynccontextmanager
+async def checked_out(agent_id: str):
+    """The agent for the duration of a request - it isn't evicted meanwhile"""
+    agent = await checkout(agent_id)
+    try:
+        yield agent
+    finally:
+        await release(agent_id)
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Trading Agent API is running!",
-        "agent_initialized": agent is not None
+        "agent_initialized": await run_blocking(registry.exists, DEFAULT_AGENT_ID)
     }
 
-@app.post("/agent/initialize")
-def initialize_agent(request: InitializeAgentRequest):
-    """Initialize a new trading agent"""
-    global agent
+@app.post("/agents")
+async def create_agent(request: CreateAgentRequest):
+    """Create a trading agent under its own id"""
+    agent_id = request.agent_id or uuid.uuid4().hex[:12]
     api_key = request.api_key or os.getenv("MISTRAL_API_KEY")
-    agent = TradingAgent(
-        name=request.name,
-        initial_balance=request.initial_balance,
-        api_key=api_key
-    )
+    try:
+        await run_blocking(registry.create, agent_id, request.name, request.initial_balance, api_key)
+    except AgentExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "message": f"Agent '{request.name}' initialized",
+        "agent_id": agent_id,
+        "message": f"Agent '{request.name}' created",
         "initial_balance": request.initial_balance,
         "has_api_key": bool(api_key)
     }
 
-@app.get("/agent/status")
-def get_agent_status():
-    """Get current agent status"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
+@app.get("/agents")
+async def list_agents():
+    """List every agent id, resident in memory or saved to disk"""
+    return {"agents": await run_blocking(registry.list)}
 
-    stats = agent.get_performance_stats()
-    return {
-        "name": agent.name,
-        "initialized": True,
-        **stats
-    }
+@app.get("/agents/stats")
+async def get_registry_stats():
+    """Get resident/evicted agent counters"""
+    return await run_blocking(registry.stats)
 
-@app.post("/agent/decide")
-def make_decision(request: TradeRequest):
-    """Let agent analyze and make trading decision"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
+@app.delete("/agents/{agent_id}")
+async def delete_agent(agent_id: str):
+    """Delete an agent and its saved state"""
+    try:
+        await run_blocking(registry.delete, agent_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+    return {"message": f"Agent '{agent_id}' deleted"}
 
-    decision = agent.make_decision(request.symbol)
+@app.get("/agents/{agent_id}")
+async def get_agent_status(agent_id: str):
+    """Get an agent's status and performance"""
+    async with checked_out(agent_id) as agent:
+        stats = await agent.get_performance_stats_async(market_data_service)
+        return {
+            "agent_id": agent_id,
+            "name": agent.name,
+            "initialized": True,
+            **stats
+        }
+
+@app.post("/agents/{agent_id}/decide")
+async def make_decision(agent_id: str, request: TradeRequest):
+    """Let an agent analyze and make trading decision"""
+    async with checked_out(agent_id) as agent:
+        decision = await agent.make_decision_async(request.symbol, market_data_service=market_data_service)
     if not decision:
         raise HTTPException(status_code=400, detail="Could not make decision")
 
     return decision
 
-@app.post("/agent/trade")
-def execute_manual_trade(request: ManualTradeRequest):
-    """Execute a manual trade"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
-
-    market_data = agent.get_market_data(request.symbol)
-    if not market_data:
-        raise HTTPException(status_code=400, detail="Could not fetch market data")
-
-    success = agent.execute_trade(
-        request.symbol,
-        request.action,
-        request.quantity,
-        market_data["current_price"],
-        "Manual trade"
+@app.get("/agents/{agent_id}/decide/stream")
+async def stream_decision(agent_id: str, symbol: str):
+    """Server-sent events: AI tokens as they arrive, the decision (and any trade) as soon as it's actionable"""
+    agent = await checkout(agent_id)
+    try:
+        market_data = await market_data_service.get_market_data(symbol.upper())
+        stream = agent.make_decision_streaming(symbol.upper(), market_data)
+    except BaseException:
+        await release(agent_id)
+        raise
+    done = object()
+
+    async def events():
+        # The agent stays checked out until the stream ends
+        try:
+            # The token stream blocks between chunks - pull each one on the blocking executor
+            while True:
+                event = await run_blocking(next, stream, done)
+                if event is done:
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            await release(agent_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@app.post("/agents/{agent_id}/trade")
+async def execute_manual_trade(agent_id: str, request: ManualTradeRequest):
+    """Execute a manual trade"""
+    async with checked_out(agent_id) as agent:
+        # Only the price is needed - a quote, shared with valuation through the cache
+        quote = await market_data_service.get_quote(request.symbol)
+        if not quote:
+            raise HTTPException(status_code=400, detail="Could not fetch market data")
+
+        success = await asyncio.wrap_future(agent.submit_trade(
+            request.symbol,
+            request.action,
+            request.quantity,
+            quote["price"],
+            "Manual trade"
+        ))
+
     if not success:
         raise HTTPException(status_code=400, detail="Trade execution failed")
 
     return {"message": "Trade executed successfully"}
 
-@app.get("/agent/portfolio")
-def get_portfolio():
+@app.get("/agents/{agent_id}/portfolio")
+async def get_portfolio(agent_id: str):
     """Get current portfolio"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
+    async with checked_out(agent_id) as agent:
+        snapshot = await agent.valuation_snapshot_async(market_data_service)
+        return {
+            "balance": agent.balance,
+            "holdings": agent.portfolio,
+            "portfolio_value": snapshot["total_portfolio_value"]
+        }
+
+@app.get("/agents/{agent_id}/llm/stats")
+async def get_llm_stats(agent_id: str):
+    """Get LLM call accounting (calls made, calls skipped by the decision cache)"""
+    async with checked_out(agent_id) as agent:
+        return agent.llm_stats()
+
+@app.get("/agents/{agent_id}/history")
+async def get_trade_history(
+    agent_id: str,
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    symbol: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """Get a page of trade history, newest first (pass next_cursor back as cursor for the next page)"""
+    async with checked_out(agent_id):
+        return await run_blocking(trade_store.trades, agent_id, limit, cursor, symbol, start, end)
+
+@app.get("/agents/{agent_id}/history/summary")
+async def get_trade_summary(agent_id: str, start: Optional[str] = None, end: Optional[str] = None):
+    """Get trades, volume and realized P&L per symbol"""
+    async with checked_out(agent_id):
+        return await run_blocking(trade_store.summary, agent_id, start, end)
 
+@app.get("/agents/{agent_id}/decisions")
+async def get_decision_history(
+    agent_id: str,
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    symbol: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """Get a page of decision history, newest first"""
+    async with checked_out(agent_id):
+        return await run_blocking(trade_store.decisions, agent_id, limit, cursor, symbol, start, end)
+
+# Single-agent routes, kept for the dashboard - they act on the "default" agent
+
+@app.post("/agent/initialize")
+async def initialize_agent(request: InitializeAgentRequest):
+    """Initialize (or replace) the default trading agent"""
+    api_key = request.api_key or os.getenv("MISTRAL_API_KEY")
+    await run_blocking(registry.create, DEFAULT_AGENT_ID, request.name, request.initial_balance, api_key, replace=True)
     return {
-        "balance": agent.balance,
-        "holdings": agent.portfolio,
-        "portfolio_value": agent.calculate_portfolio_value()
+        "message": f"Agent '{request.name}' initialized",
+        "initial_balance": request.initial_balance,
+        "has_api_key": bool(api_key)
     }
 
+@app.get("/agent/status")
+async def get_default_agent_status():
+    return await get_agent_status(DEFAULT_AGENT_ID)
+
+@app.post("/agent/decide")
+async def make_default_decision(request: TradeRequest):
+    return await make_decision(DEFAULT_AGENT_ID, request)
+
+@app.get("/agent/decide/stream")
+async def stream_default_decision(symbol: str):
+    return await stream_decision(DEFAULT_AGENT_ID, symbol)
+
+@app.post("/agent/trade")
+async def execute_default_manual_trade(request: ManualTradeRequest):
+    return await execute_manual_trade(DEFAULT_AGENT_ID, request)
+
+@app.get("/agent/portfolio")
+async def get_default_portfolio():
+    return await get_portfolio(DEFAULT_AGENT_ID)
+
+@app.get("/agent/llm/stats")
+async def get_default_llm_stats():
+    return await get_llm_stats(DEFAULT_AGENT_ID)
+
 @app.get("/agent/history")
-def get_trade_history():
-    """Get trade history"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
+async def get_default_trade_history(
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    symbol: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    return await get_trade_history(DEFAULT_AGENT_ID, limit, cursor, symbol, start, end)
 
-    return {
-        "trades": agent.trade_history,
-        "total_trades": len(agent.trade_history)
-    }
+@app.get("/agent/history/summary")
+async def get_default_trade_summary(start: Optional[str] = None, end: Optional[str] = None):
+    return await get_trade_summary(DEFAULT_AGENT_ID, start, end)
+
+@app.get("/agent/decisions")
+async def get_default_decision_history(
+    limit: int = 50,
+    cursor: Optional[int] = None,
+    symbol: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    return await get_decision_history(DEFAULT_AGENT_ID, limit, cursor, symbol, start, end)
+
+@app.get("/market/cache/stats")
+async def get_market_cache_stats():
+    """Get market data cache hit/miss/eviction counters"""
+    return MarketDataService.cache_stats()
+
+@app.get("/market/batch")
+async def get_market_data_batch(symbols: str, period: str = "1mo", interval: str = "1d"):
+    """Get market data for several comma-separated symbols in one bulk fetch"""
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols given")
+
+    batch = await market_data_service.get_market_data_batch(symbol_list, period, interval)
+    return {symbol: MarketDataService.to_json(data) for symbol, data in batch.items()}
+
+@app.get("/market/rate-limits")
+async def get_market_rate_limits():
+    """Get Alpha Vantage budget and per-priority grant/deny counters"""
+    return MarketDataService.rate_limit_stats()
+
+@app.get("/market/sources")
+async def get_market_sources():
+    """Get per-source health, circuit breaker state and recently served requests"""
+    return MarketDataService.source_stats()
 
 @app.get("/market/{symbol}")
-def get_market_data(symbol: str, period: str = "1mo", interval: str = "1d"):
+async def get_market_data(symbol: str, period: str = "1mo", interval: str = "1d"):
     """Get market data for a symbol with custom interval for scalping"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
-
-    from market_data_service import MarketDataService
-    data = MarketDataService.get_market_data(symbol, period, interval)
+    data = await market_data_service.get_market_data(symbol, period, interval)
     if not data:
         raise HTTPException(status_code=404, detail="Market data not found")
 
-    return data
+    return MarketDataService.to_json(data)
 
 @app.post("/agent/save")
-def save_agent_state(filename: str = "agent_state.json"):
-    """Save agent state to file"""
-    if not agent:
-        raise HTTPException(status_code=400, detail="Agent not initialized")
-
-    agent.save_state(filename)
+async def save_agent_state(filename: str = "agent_state.json"):
+    """Save the default agent's state to file"""
+    async with checked_out(DEFAULT_AGENT_ID) as agent:
+        await run_blocking(agent.save_state, filename)
     return {"message": f"State saved to {filename}"}
 
 @app.post("/agent/load")
-def load_agent_state(filename: str = "agent_state.json"):
-    """Load agent state from file"""
-    global agent
-    if not agent:
+async def load_agent_state(filename: str = "agent_state.json"):
+    """Load the default agent's state from file"""
+    if not await run_blocking(registry.exists, DEFAULT_AGENT_ID):
         # Create a temporary agent to load state
-        agent = TradingAgent("temp", 0)
+        await run_blocking(registry.create, DEFAULT_AGENT_ID, "temp", 0)
 
     try:
-        agent.load_state(filename)
+        async with checked_out(DEFAULT_AGENT_ID) as agent:
+            await run_blocking(agent.load_state, filename)
         return {"message": f"State loaded from {filename}"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
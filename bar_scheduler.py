@@ -0,0 +1,130 @@
+"""
+Bar-aligned scheduling for the scalping bot
+Wakes a moment after each bar closes on the exchange clock instead of
+sleeping a fixed time after the work, so cycles don't drift. Bars missed
+while a cycle overran are skipped, the bot sleeps through closed sessions,
+and the lag between bar close and each decision is tracked.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from datetime import time as dtime
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+
+class MarketSession:
+    """Regular trading hours on weekdays (no exchange holiday calendar)"""
+
+    def __init__(self, timezone: str = "America/New_York", open_time: dtime = dtime(9, 30), close_time: dtime = dtime(16, 0)):
+        self.tz = ZoneInfo(timezone)
+        self.open_time = open_time
+        self.close_time = close_time
+
+    def has_bar_closing_at(self, moment: datetime) -> bool:
+        """Whether a regular-session bar closes at moment (the open itself closes no bar)"""
+        local = moment.astimezone(self.tz)
+        return local.weekday() < 5 and self.open_time < local.time() <= self.close_time
+
+    def next_open(self, moment: datetime) -> datetime:
+        """The next session open strictly after moment"""
+        local = moment.astimezone(self.tz)
+        day = local.date()
+        while True:
+            opens_at = datetime.combine(day, self.open_time, tzinfo=self.tz)
+            if day.weekday() < 5 and opens_at > local:
+                return opens_at
+            day += timedelta(days=1)
+
+
+class BarScheduler:
+    """Hands out bar closes to process, one per call, aligned to the exchange clock"""
+
+    def __init__(self, interval_seconds: int, session: Optional[MarketSession] = None, settle_seconds: float = 2.0, history: int = 500):
+        self.interval = interval_seconds
+        self.session = session
+        # Give data sources a moment to publish the bar that just closed
+        self.settle_seconds = settle_seconds
+        self.tz = session.tz if session else ZoneInfo("America/New_York")
+
+        self._stop = threading.Event()
+        self._last_bar: Optional[float] = None  # epoch seconds of the last bar handed out
+        self._lags = deque(maxlen=history)
+
+        self.bars = 0
+        self.skipped_bars = 0
+        self.overruns = 0
+
+    def stop(self):
+        self._stop.set()
+
+    def next_bar(self) -> Optional[datetime]:
+        """Block until the next bar to process has closed; None once stopped
+
+        If the previous cycle overran, the bars it missed are skipped and the most
+        recent closed bar is returned straight away.
+        """
+        while not self._stop.is_set():
+            now = time.time()
+            latest = self._floor(now)
+
+            if self._last_bar is None:
+                target = latest + self.interval
+            else:
+                target = self._last_bar + self.interval
+                if latest > target:
+                    skipped = int((latest - target) // self.interval)
+                    self.overruns += 1
+                    self.skipped_bars += skipped
+                    print(f"⚠️  Last cycle overran - skipping {skipped} bar(s)")
+                    target = latest
+
+            close_at = datetime.fromtimestamp(target, self.tz)
+            if self.session and not self.session.has_bar_closing_at(close_at):
+                opens_at = self.session.next_open(close_at - timedelta(seconds=self.interval))
+                print(f"🌙 Market closed - pausing until {opens_at:%a %Y-%m-%d %H:%M %Z}")
+                self._last_bar = opens_at.timestamp()
+                if self._stop.wait(max(opens_at.timestamp() - now, 0)):
+                    return None
+                continue
+
+            wake_at = target + self.settle_seconds
+            if wake_at > now:
+                print(f"⏳ Next {self.interval // 60}m bar closes at {close_at:%H:%M:%S %Z}")
+                if self._stop.wait(wake_at - now):
+                    return None
+
+            self._last_bar = target
+            self.bars += 1
+            return close_at
+        return None
+
+    def record_lag(self, bar_close: datetime) -> float:
+        """Record how long after bar_close a decision was made; returns the lag in seconds"""
+        lag = time.time() - bar_close.timestamp()
+        self._lags.append(lag)
+        return lag
+
+    def stats(self) -> Dict:
+        lags = sorted(self._lags)
+
+        def percentile(p: float) -> float:
+            return round(lags[min(len(lags) - 1, int(p * len(lags)))] * 1000, 1) if lags else 0.0
+
+        return {
+            "interval_seconds": self.interval,
+            "bars": self.bars,
+            "skipped_bars": self.skipped_bars,
+            "overruns": self.overruns,
+            "lag_p50_ms": percentile(0.5),
+            "lag_p95_ms": percentile(0.95),
+            "lag_max_ms": round(lags[-1] * 1000, 1) if lags else 0.0,
+        }
+
+    def _floor(self, epoch: float) -> float:
+        """Most recent bar boundary at or before epoch, aligned to local midnight on the exchange clock"""
+        local = datetime.fromtimestamp(epoch, self.tz)
+        midnight = datetime.combine(local.date(), dtime(0), tzinfo=self.tz).timestamp()
+        return midnight + (epoch - midnight) // self.interval * self.interval
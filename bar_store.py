@@ -0,0 +1,183 @@
+"""
+Local on-disk OHLCV store
+One directory per (interval, symbol) holding append-only raw column files
+(read back as memory maps) plus a small meta.json with the bar count, the
+last stored bar and the longest period the store has been backfilled with.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from ohlcv import OHLCVFrame
+
+
+class BarStore:
+    """Per-(symbol, interval) bar storage with incremental append and period windows"""
+
+    COLUMNS = (
+        ("timestamps", np.int64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("volume", np.int64),
+    )
+
+    # Periods from shortest to longest, with their calendar span in seconds
+    PERIOD_SPANS = {
+        "1d": 1 * 86400,
+        "5d": 5 * 86400,
+        "1mo": 30 * 86400,
+        "3mo": 90 * 86400,
+        "6mo": 180 * 86400,
+        "1y": 365 * 86400,
+        "2y": 730 * 86400,
+    }
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks = defaultdict(threading.Lock)
+
+    def meta(self, symbol: str, interval: str) -> Optional[Dict]:
+        """Stored metadata, or None if nothing is stored"""
+        try:
+            with open(os.path.join(self._dir(symbol, interval), "meta.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def covers(self, meta: Optional[Dict], period: str) -> bool:
+        """Whether stored bars can serve period, given a refresh of only the bars since the last one"""
+        if not meta or not meta.get("count"):
+            return False
+
+        stored_span = self.PERIOD_SPANS.get(meta.get("period"), 0)
+        wanted_span = self.PERIOD_SPANS.get(period)
+        if wanted_span is None or stored_span < wanted_span:
+            return False
+
+        # Too far behind - refetching the whole window is cheaper than catching up
+        return self.seconds_behind(meta) <= wanted_span
+
+    def seconds_behind(self, meta: Dict) -> int:
+        """Wall-clock seconds since the last stored bar"""
+        return self._now() - meta["last_ts"]
+
+    def load(self, symbol: str, interval: str) -> Optional[OHLCVFrame]:
+        """All stored bars as read-only memory maps (no copy)
+
+        Maps stay readable for as long as they're held (e.g. in the cache): column files
+        are swapped in whole by replace() and never shrink below a recorded count in append().
+        """
+        with self._locks[(symbol, interval)]:
+            meta = self.meta(symbol, interval)
+            if not meta or not meta.get("count"):
+                return None
+
+            path = self._dir(symbol, interval)
+            count = meta["count"]
+            columns = [
+                np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+                for name, dtype in self.COLUMNS
+            ]
+            return OHLCVFrame(*columns, intraday=meta.get("intraday", False))
+
+    def window(self, symbol: str, interval: str, period: str) -> Optional[OHLCVFrame]:
+        """Stored bars for a period, as a slice ending at the last stored bar"""
+        bars = self.load(symbol, interval)
+        if bars is None:
+            return None
+
+        if period.endswith("d") and period[:-1].isdigit():
+            # N trading days: the last N distinct dates
+            days = bars.timestamps // 86400
+            distinct = np.flatnonzero(np.diff(days)) + 1
+            starts = np.concatenate(([0], distinct))
+            n = int(period[:-1])
+            return bars[int(starts[-n]) if n < len(starts) else 0:]
+
+        span = self.PERIOD_SPANS.get(period)
+        if span is None:
+            return bars
+        return bars.since(bars.last_timestamp - span)
+
+    def replace(self, symbol: str, interval: str, bars: OHLCVFrame, period: str, info: Dict):
+        """Store a full backfill for period, replacing anything stored before"""
+        with self._locks[(symbol, interval)]:
+            path = self._dir(symbol, interval)
+            os.makedirs(path, exist_ok=True)
+            for name, dtype in self.COLUMNS:
+                # New files swapped in, never truncated in place - older maps keep the old inode
+                column_path = os.path.join(path, f"{name}.bin")
+                with open(column_path + ".tmp", "wb") as f:
+                    f.write(np.ascontiguousarray(getattr(bars, name), dtype=dtype).tobytes())
+                os.replace(column_path + ".tmp", column_path)
+            self._write_meta(symbol, interval, bars, len(bars), period, info)
+
+    def append(self, symbol: str, interval: str, bars: OHLCVFrame, info: Dict) -> int:
+        """Append bars newer than the last stored one; a refetched last bar overwrites it
+
+        Returns the number of bars written.
+        """
+        with self._locks[(symbol, interval)]:
+            meta = self.meta(symbol, interval)
+            if not meta or not meta.get("count"):
+                return 0
+
+            new_bars = bars.since(meta["last_ts"])
+            if not len(new_bars):
+                return 0
+
+            count = meta["count"]
+            if new_bars.timestamps[0] == meta["last_ts"]:
+                # The last stored bar may have been still forming - rewrite it
+                count -= 1
+
+            path = self._dir(symbol, interval)
+            new_count = count + len(new_bars)
+            for name, dtype in self.COLUMNS:
+                column_path = os.path.join(path, f"{name}.bin")
+                # Write over the end in place rather than truncating first: the file never gets
+                # shorter than the recorded count, which is what existing maps cover
+                with open(column_path, "r+b") as f:
+                    f.seek(count * np.dtype(dtype).itemsize)
+                    f.write(np.ascontiguousarray(getattr(new_bars, name), dtype=dtype).tobytes())
+                    # Drop anything past the new end (e.g. a write interrupted before meta was updated)
+                    f.truncate(new_count * np.dtype(dtype).itemsize)
+
+            self._write_meta(symbol, interval, new_bars, new_count, meta["period"], info, first_ts=meta["first_ts"])
+            return len(new_bars)
+
+    def _write_meta(self, symbol: str, interval: str, bars: OHLCVFrame, count: int, period: str, info: Dict, first_ts: Optional[int] = None):
+        meta = {
+            "symbol": symbol,
+            "interval": interval,
+            "intraday": bars.intraday,
+            "count": count,
+            "first_ts": first_ts if first_ts is not None else int(bars.timestamps[0]),
+            "last_ts": int(bars.timestamps[-1]),
+            "period": period,
+            "updated_at": time.time(),
+            **info
+        }
+        path = os.path.join(self._dir(symbol, interval), "meta.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        safe_symbol = "".join(c if c.isalnum() or c in "-_.^=" else "_" for c in symbol)
+        return os.path.join(self.root, interval, safe_symbol)
+
+    @staticmethod
+    def _now() -> int:
+        """Current wall-clock time in the same epoch convention as OHLCVFrame timestamps"""
+        return int(np.datetime64(datetime.now().replace(microsecond=0), "s").astype(np.int64))
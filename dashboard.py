@@ -86,15 +86,28 @@ def make_decision(symbol: str):
         st.error(f"Error: {e}")
         return None
 
-def get_trade_history():
-    """Get trade history"""
+def get_trade_history(limit: int = 50, cursor=None):
+    """Get one page of trade history, newest first"""
     try:
-        response = requests.get(f"{API_URL}/agent/history")
+        params = {"limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = requests.get(f"{API_URL}/agent/history", params=params)
         if response.status_code == 200:
-            return response.json()["trades"]
-        return []
+            return response.json()
+        return {"trades": [], "next_cursor": None, "total_trades": 0}
+    except:
+        return {"trades": [], "next_cursor": None, "total_trades": 0}
+
+def get_trade_summary():
+    """Get per-symbol trade counts and realized P&L"""
+    try:
+        response = requests.get(f"{API_URL}/agent/history/summary")
+        if response.status_code == 200:
+            return response.json()
+        return None
     except:
-        return []
+        return None
 
 def get_market_data(symbol: str, period: str = "3mo"):
     """Get market data"""
@@ -405,7 +418,10 @@ if status:
     with tab3:
         st.subheader("Trade History")
 
-        trades = get_trade_history()
+        # Page through history with cursors - only the rows on screen are fetched
+        cursors = st.session_state.setdefault("history_cursors", [None])
+        page = get_trade_history(cursor=cursors[-1])
+        trades = page["trades"]
 
         if trades:
             trades_df = pd.DataFrame(trades)
@@ -426,19 +442,35 @@ if status:
 
             st.dataframe(trades_df, use_container_width=True, hide_index=True)
 
-            # Trade statistics
-            st.subheader("Trade Statistics")
-            col1, col2, col3 = st.columns(3)
-
-            buy_trades = [t for t in trades if t['action'] == 'BUY']
-            sell_trades = [t for t in trades if t['action'] == 'SELL']
+            col_newer, col_page, col_older = st.columns([1, 2, 1])
+            with col_newer:
+                if len(cursors) > 1 and st.button("← Newer"):
+                    cursors.pop()
+                    st.rerun()
+            with col_page:
+                st.caption(f"Page {len(cursors)} of {page['total_trades']} trades")
+            with col_older:
+                if page["next_cursor"] is not None and st.button("Older →"):
+                    cursors.append(page["next_cursor"])
+                    st.rerun()
 
-            with col1:
-                st.metric("Total Trades", len(trades))
-            with col2:
-                st.metric("Buy Trades", len(buy_trades))
-            with col3:
-                st.metric("Sell Trades", len(sell_trades))
+            # Trade statistics (aggregated server-side over the whole history)
+            summary = get_trade_summary()
+            if summary:
+                st.subheader("Trade Statistics")
+                col1, col2, col3, col4 = st.columns(4)
+
+                with col1:
+                    st.metric("Total Trades", summary["total_trades"])
+                with col2:
+                    st.metric("Buy Trades", summary["buys"])
+                with col3:
+                    st.metric("Sell Trades", summary["sells"])
+                with col4:
+                    st.metric("Realized P/L", f"${summary['realized_pnl']:,.2f}")
+
+                if summary["by_symbol"]:
+                    st.dataframe(pd.DataFrame(summary["by_symbol"]), use_container_width=True, hide_index=True)
 
         else:
             st.info("No trades yet. Make your first decision!")
@@ -0,0 +1,81 @@
+"""
+Decision cache for LLM trading decisions
+Fingerprints the inputs that matter to a decision (rounded price move,
+volume bucket, holdings, balance band) and reuses the last decision for a
+symbol while its fingerprint is unchanged and the decision is still fresh.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class DecisionCache:
+    """Per-symbol decision reuse gated on a fingerprint of the material inputs"""
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        price_step_bps: float = 20.0,
+        change_step_pct: float = 0.25,
+        balance_band: float = 0.05
+    ):
+        self.ttl = ttl
+        self.price_step = price_step_bps / 10_000
+        self.change_step_pct = change_step_pct
+        self.balance_band = balance_band
+
+        self._entries = {}  # {symbol: (fingerprint, expires_at, decision)}
+        self._lock = threading.Lock()
+
+        self.llm_calls = 0
+        self.skipped = 0
+
+    def fingerprint(self, market_data: Dict, holdings: int, balance: float, initial_balance: float) -> Tuple:
+        """Bucketed view of the inputs - small moves map to the same fingerprint"""
+        price = market_data["current_price"]
+        band = initial_balance * self.balance_band if initial_balance > 0 else 1.0
+        return (
+            round(math.log(price) / self.price_step) if price > 0 else 0,
+            round(market_data["change_percent"] / self.change_step_pct),
+            int(math.log2(market_data["volume"] + 1)),
+            holdings,
+            int(balance // band),
+        )
+
+    def get(self, symbol: str, fingerprint: Tuple) -> Optional[Dict]:
+        """The cached decision for symbol if its fingerprint still matches and it hasn't expired"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None:
+                return None
+
+            cached_fingerprint, expires_at, decision = entry
+            if cached_fingerprint != fingerprint or expires_at <= time.monotonic():
+                del self._entries[symbol]
+                return None
+
+            self.skipped += 1
+            return decision
+
+    def put(self, symbol: str, fingerprint: Tuple, decision: Dict):
+        """Remember a fresh LLM decision for symbol"""
+        with self._lock:
+            self._entries[symbol] = (fingerprint, time.monotonic() + self.ttl, decision)
+
+    def record_call(self):
+        """Count a decision that went to the LLM"""
+        with self._lock:
+            self.llm_calls += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            decisions = self.llm_calls + self.skipped
+            return {
+                "llm_calls": self.llm_calls,
+                "skipped": self.skipped,
+                "skip_rate": self.skipped / decisions if decisions else 0.0,
+                "cached_symbols": len(self._entries),
+                "ttl_seconds": self.ttl,
+            }
@@ -0,0 +1,68 @@
+"""
+Incremental parser for streamed LLM trading decisions
+Scans the completion as tokens arrive and reports the actionable fields
+(action, confidence, suggested_quantity) as soon as each one is complete,
+well before the closing brace and the reasoning text have streamed in.
+"""
+
+import json
+import re
+from typing import Dict, Optional
+
+# A field counts as complete once its value is followed by a delimiter, so a
+# number still being streamed ("0." of "0.85") is never read early
+_FIELD_PATTERNS = {
+    "action": re.compile(r'"action"\s*:\s*"(BUY|SELL|HOLD)"', re.IGNORECASE),
+    "confidence": re.compile(r'"confidence"\s*:\s*"?([0-9]*\.?[0-9]+)"?\s*[,}\n]'),
+    "suggested_quantity": re.compile(r'"suggested_quantity"\s*:\s*(null|"?[0-9]+(?:\.[0-9]+)?"?)\s*[,}\n]'),
+}
+
+ACTION_FIELDS = tuple(_FIELD_PATTERNS)
+
+
+class DecisionStreamParser:
+    """Accumulates streamed text and extracts decision fields as they complete"""
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict = {}
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk of completion text; True once every actionable field is known"""
+        self.text += chunk
+        for name, pattern in _FIELD_PATTERNS.items():
+            if name in self.fields:
+                continue
+            match = pattern.search(self.text)
+            if match:
+                self.fields[name] = self._convert(name, match.group(1))
+        return self.actionable
+
+    @property
+    def actionable(self) -> bool:
+        return all(name in self.fields for name in ACTION_FIELDS)
+
+    def early_decision(self) -> Optional[Dict]:
+        """The actionable fields as a decision (reasoning still pending), or None if incomplete"""
+        if not self.actionable:
+            return None
+        return {**self.fields, "reasoning": ""}
+
+    def final_decision(self) -> Optional[Dict]:
+        """The complete decision parsed from the whole completion, or None if it isn't valid JSON"""
+        if "{" not in self.text or "}" not in self.text:
+            return None
+        try:
+            decision = json.loads(self.text[self.text.index("{"):self.text.rindex("}") + 1])
+        except ValueError:
+            return None
+        return decision if isinstance(decision, dict) else None
+
+    @staticmethod
+    def _convert(name: str, raw: str):
+        raw = raw.strip('"')
+        if name == "action":
+            return raw.upper()
+        if name == "confidence":
+            return float(raw)
+        return None if raw == "null" else int(float(raw))
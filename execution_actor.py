@@ -0,0 +1,92 @@
+"""
+Serialized execution for an agent's account
+One queue and one consumer thread per agent: orders (and anything else that
+reads-then-writes balance and positions) are applied strictly in sequence,
+so callers can fetch and analyze concurrently and only queue up the
+bookkeeping. The consumer exits when idle and restarts on the next order.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutionActor:
+    """Runs submitted calls one at a time, in submission order, on its own thread"""
+
+    def __init__(self, name: str = "execution", idle_seconds: float = 30.0, history: int = 200):
+        self.name = name
+        self.idle_seconds = idle_seconds
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._waits = deque(maxlen=history)  # seconds each call sat in the queue
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        """Queue fn(*args, **kwargs); the Future resolves once it has run
+
+        From async code, await asyncio.wrap_future(actor.submit(...)).
+        """
+        future = Future()
+        with self._lock:
+            self.submitted += 1
+            self._queue.put((future, fn, args, kwargs, time.perf_counter()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._consume, name=self.name, daemon=True)
+                self._thread.start()
+        return future
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn on the actor and wait for it (inline when already on the actor's thread)"""
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queued": self._queue.qsize(),
+                "running": self._thread is not None,
+                "queue_wait_p95_ms": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else 0.0,
+            }
+
+    def _consume(self):
+        while True:
+            try:
+                future, fn, args, kwargs, queued_at = self._queue.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                with self._lock:
+                    # submit() queues under the lock, so nothing can slip in between these two steps
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._waits.append(time.perf_counter() - queued_at)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                with self._lock:
+                    self.failed += 1
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    self.completed += 1
+                future.set_result(result)
@@ -18,6 +18,7 @@ export default function Dashboard({ agentStatus, refreshStatus }: Props) {
   const [period, setPeriod] = useState('1d');
   const [isTrading, setIsTrading] = useState(false);
   const [lastDecisions, setLastDecisions] = useState<Map<string, Decision & { symbol: string }>>(new Map());
+  const [streamingText, setStreamingText] = useState<Map<string, string>>(new Map());
   const [marketDataMap, setMarketDataMap] = useState<Map<string, MarketData>>(new Map());
   const [autoTrade, setAutoTrade] = useState(false);
   const [selectedSymbol, setSelectedSymbol] = useState('AAPL');
@@ -34,13 +35,18 @@ export default function Dashboard({ agentStatus, refreshStatus }: Props) {
 
   // Fetch market data for all watchlist symbols
   const loadAllMarketData = async () => {
-    for (const symbol of watchlist) {
-      try {
-        const data = await api.getMarketData(symbol, period, interval);
-        setMarketDataMap(prev => new Map(prev).set(symbol, data));
-      } catch (error) {
-        console.error(`Failed to load ${symbol}:`, error);
-      }
+    if (watchlist.length === 0) return;
+    try {
+      const batch = await api.getMarketDataBatch(watchlist, period, interval);
+      setMarketDataMap(prev => {
+        const next = new Map(prev);
+        for (const [symbol, data] of Object.entries(batch)) {
+          next.set(symbol, data);
+        }
+        return next;
+      });
+    } catch (error) {
+      console.error('Failed to load market data:', error);
     }
   };
 
@@ -82,17 +88,33 @@ export default function Dashboard({ agentStatus, refreshStatus }: Props) {
     setWatchlist(watchlist.filter(s => s !== symbol));
   };
 
-  const handleTradeOne = async (symbol: string) => {
+  // Stream the decision so its reasoning shows up as the model writes it
+  const handleTradeOne = (symbol: string) => {
     setIsTrading(true);
-    try {
-      const decision = await api.makeDecision(symbol);
-      setLastDecisions(prev => new Map(prev).set(symbol, { ...decision, symbol }));
-      await refreshStatus();
-    } catch (error) {
-      console.error('Trading failed:', error);
-    } finally {
+    setStreamingText(prev => new Map(prev).set(symbol, ''));
+    const finish = () => {
+      setStreamingText(prev => {
+        const next = new Map(prev);
+        next.delete(symbol);
+        return next;
+      });
       setIsTrading(false);
-    }
+    };
+
+    api.streamDecision(symbol, {
+      onToken: (text) => setStreamingText(prev => new Map(prev).set(symbol, (prev.get(symbol) ?? '') + text)),
+      onDecision: (decision) => setLastDecisions(prev => new Map(prev).set(symbol, { ...decision, symbol })),
+      onTrade: () => refreshStatus(),
+      onComplete: (decision) => {
+        setLastDecisions(prev => new Map(prev).set(symbol, { ...decision, symbol }));
+        refreshStatus();
+        finish();
+      },
+      onError: (detail) => {
+        console.error('Trading failed:', detail);
+        finish();
+      },
+    });
   };
 
   const chartData = marketDataMap.get(selectedSymbol)?.historical_data.Date.map((date, i) => ({
@@ -356,6 +378,17 @@ export default function Dashboard({ agentStatus, refreshStatus }: Props) {
               )}
             </div>
 
+            {/* Decisions still streaming in */}
+            {Array.from(streamingText.entries()).map(([symbol, text]) => (
+              <div key={`streaming-${symbol}`} className="bg-white/80 backdrop-blur-xl border border-purple-200 rounded-2xl p-6 shadow-lg">
+                <h3 className="text-lg font-bold text-gray-800 flex items-center gap-2 mb-2">
+                  <Activity className="w-5 h-5 text-purple-600 animate-pulse" />
+                  {symbol} Thinking...
+                </h3>
+                <div className="text-gray-700 text-sm whitespace-pre-wrap">{text}</div>
+              </div>
+            ))}
+
             {/* AI Decisions */}
             {Array.from(lastDecisions.values()).slice(0, 3).map(decision => (
               <div key={decision.symbol} className="bg-gradient-to-r from-purple-100 via-blue-100 to-pink-100 backdrop-blur-xl border border-purple-300 rounded-2xl p-6 shadow-lg">
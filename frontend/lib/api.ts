@@ -46,6 +46,7 @@ export interface Holding {
 }
 
 export interface Trade {
+  id?: number;
   timestamp: string;
   action: 'BUY' | 'SELL';
   symbol: string;
@@ -53,9 +54,24 @@ export interface Trade {
   price: number;
   total: number;
   balance_after: number;
+  realized_pnl?: number | null;
   reasoning: string;
 }
 
+export interface TradePage {
+  trades: Trade[];
+  next_cursor: number | null;
+  total_trades: number;
+}
+
+export interface TradeSummary {
+  total_trades: number;
+  buys: number;
+  sells: number;
+  realized_pnl: number;
+  by_symbol: { symbol: string; trades: number; buys: number; sells: number; volume: number; realized_pnl: number }[];
+}
+
 export interface Decision {
   action: 'BUY' | 'SELL' | 'HOLD';
   confidence: number;
@@ -91,6 +107,36 @@ export const api = {
     return res.json();
   },
 
+  // Streams AI tokens and acts as soon as the decision is actionable; returns a function that stops the stream
+  streamDecision: (
+    symbol: string,
+    handlers: {
+      onToken?: (text: string) => void;
+      onDecision?: (decision: Decision, early: boolean) => void;
+      onTrade?: (trades: Trade[]) => void;
+      onComplete?: (decision: Decision) => void;
+      onError?: (detail: string) => void;
+    }
+  ): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/agent/decide/stream?symbol=${encodeURIComponent(symbol)}`);
+    source.addEventListener('token', (e) => handlers.onToken?.(JSON.parse((e as MessageEvent).data).text));
+    source.addEventListener('decision', (e) => {
+      const event = JSON.parse((e as MessageEvent).data);
+      handlers.onDecision?.(event.decision, event.early);
+    });
+    source.addEventListener('trade', (e) => handlers.onTrade?.(JSON.parse((e as MessageEvent).data).trades));
+    source.addEventListener('complete', (e) => {
+      handlers.onComplete?.(JSON.parse((e as MessageEvent).data).decision);
+      source.close();
+    });
+    source.addEventListener('error', (e) => {
+      const data = (e as MessageEvent).data;
+      handlers.onError?.(data ? JSON.parse(data).detail : 'Decision stream failed');
+      source.close();
+    });
+    return () => source.close();
+  },
+
   // Market data
   getMarketData: async (symbol: string, period: string = '1mo', interval: string = '1d'): Promise<MarketData> => {
     const res = await fetch(`${API_BASE_URL}/market/${symbol}?period=${period}&interval=${interval}`);
@@ -98,9 +144,30 @@ export const api = {
     return res.json();
   },
 
-  // Trade history
-  getTradeHistory: async (): Promise<{ trades: Trade[]; total_trades: number }> => {
-    const res = await fetch(`${API_BASE_URL}/agent/history`);
+  getMarketDataBatch: async (symbols: string[], period: string = '1mo', interval: string = '1d'): Promise<Record<string, MarketData>> => {
+    const query = encodeURIComponent(symbols.join(','));
+    const res = await fetch(`${API_BASE_URL}/market/batch?symbols=${query}&period=${period}&interval=${interval}`);
+    if (!res.ok) throw new Error('Failed to fetch market data');
+    return res.json();
+  },
+
+  // Trade history, one page at a time (newest first; pass next_cursor back as cursor)
+  getTradeHistory: async (
+    options: { limit?: number; cursor?: number | null; symbol?: string; start?: string; end?: string } = {}
+  ): Promise<TradePage> => {
+    const params = new URLSearchParams({ limit: String(options.limit ?? 50) });
+    if (options.cursor != null) params.set('cursor', String(options.cursor));
+    if (options.symbol) params.set('symbol', options.symbol);
+    if (options.start) params.set('start', options.start);
+    if (options.end) params.set('end', options.end);
+    const res = await fetch(`${API_BASE_URL}/agent/history?${params}`);
+    if (!res.ok) throw new Error('Failed to fetch trade history');
+    return res.json();
+  },
+
+  getTradeSummary: async (): Promise<TradeSummary> => {
+    const res = await fetch(`${API_BASE_URL}/agent/history/summary`);
+    if (!res.ok) throw new Error('Failed to fetch trade summary');
     return res.json();
   },
 
@@ -0,0 +1,284 @@
+"""
+LLM client interface for the trading agent
+MistralLLMClient talks to the real API; FakeLLMClient is an in-process
+stand-in with configurable latency, error rate and malformed output, so the
+decision path can be load-tested offline.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+
+class LLMCompletion:
+    """Text of one completion plus its token usage"""
+
+    __slots__ = ("content", "prompt_tokens", "completion_tokens")
+
+    def __init__(self, content: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+class TokenMeter:
+    """Running prompt/completion token totals across LLM calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / self.calls, 1) if self.calls else 0.0,
+                "avg_completion_tokens": round(self.completion_tokens / self.calls, 1) if self.calls else 0.0,
+            }
+
+
+class LLMClient:
+    """What the agent needs from a chat model"""
+
+    model = ""
+
+    def complete(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        """One completion for a single user prompt"""
+        raise NotImplementedError
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Start a streamed completion; raises if it can't be opened, then yields text chunks"""
+        raise NotImplementedError
+
+    async def complete_async(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        """Event-loop version of complete (default: complete on a worker thread)"""
+        return await asyncio.to_thread(self.complete, prompt, timeout)
+
+
+class MistralLLMClient(LLMClient):
+    """Mistral chat completions"""
+
+    def __init__(self, api_key: str, model: str = "mistral-small-latest"):
+        from mistralai import Mistral
+
+        self.model = model
+        self._client = Mistral(api_key=api_key)
+
+    def complete(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        response = self._client.chat.complete(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout_ms=int(timeout * 1000) if timeout else None
+        )
+        return self._completion(response)
+
+    @staticmethod
+    def _completion(response) -> LLMCompletion:
+        usage = response.usage
+        return LLMCompletion(
+            response.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+
+    async def complete_async(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        response = await self._client.chat.complete_async(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout_ms=int(timeout * 1000) if timeout else None
+        )
+        return self._completion(response)
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        # Open the stream here so connection errors surface to the caller's retry policy
+        events = self._client.chat.stream(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout_ms=int(timeout * 1000) if timeout else None
+        )
+        return self._texts(events)
+
+    @staticmethod
+    def _texts(events) -> Iterator[str]:
+        with events:
+            for event in events:
+                if not event.data.choices:
+                    continue
+                content = event.data.choices[0].delta.content
+                if isinstance(content, list):
+                    content = "".join(getattr(chunk, "text", "") or "" for chunk in content)
+                if isinstance(content, str) and content:
+                    yield content
+
+
+class FakeLLMError(RuntimeError):
+    """Injected failure from FakeLLMClient"""
+
+
+def fixed_latency(seconds: float) -> Callable[[random.Random], float]:
+    return lambda rng: seconds
+
+
+def lognormal_latency(median: float, p99: float) -> Callable[[random.Random], float]:
+    """Right-skewed latency with the given median and 99th percentile (seconds)"""
+    sigma = math.log(p99 / median) / 2.326
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+class FakeLLMClient(LLMClient):
+    """In-process LLM stand-in that answers trading prompts with random but well-formed decisions
+
+    latency draws a response time in seconds from a random.Random; error_rate and
+    malformed_rate are per-call probabilities of raising FakeLLMError or returning
+    text that isn't valid decision JSON. decide(symbol, rng) can replace the random
+    decisions. seed makes a run reproducible.
+    """
+
+    model = "fake"
+
+    # Batch prompts list one symbol per line as "- SYMBOL: ..."
+    _BATCH_SYMBOL = re.compile(r"^- ([A-Z0-9.\-^=]+):", re.MULTILINE)
+    _SINGLE_SYMBOL = re.compile(r"Symbol:\s*([A-Z0-9.\-^=]+)")
+
+    def __init__(
+        self,
+        latency: Optional[Callable[[random.Random], float]] = None,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        decide: Optional[Callable[[str, random.Random], Dict]] = None,
+        stream_chunk_chars: int = 8,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency or lognormal_latency(0.4, 2.0)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.decide = decide or self._random_decision
+        self.stream_chunk_chars = stream_chunk_chars
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.malformed = 0
+
+    def complete(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        latency, content = self._draw(prompt, timeout)
+        time.sleep(latency)
+        return self._completion(prompt, content)
+
+    async def complete_async(self, prompt: str, timeout: Optional[float] = None) -> LLMCompletion:
+        latency, content = self._draw(prompt, timeout, sleep=False)
+        if timeout is not None and latency > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"fake LLM timed out after {timeout:.2f}s")
+        await asyncio.sleep(latency)
+        if content is None:
+            raise FakeLLMError("injected LLM failure")
+        return self._completion(prompt, content)
+
+    @staticmethod
+    def _completion(prompt: str, content: str) -> LLMCompletion:
+        return LLMCompletion(content, prompt_tokens=math.ceil(len(prompt) / 4), completion_tokens=math.ceil(len(content) / 4))
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        latency, content = self._draw(prompt, timeout)
+        return self._chunks(content, latency)
+
+    def _chunks(self, content: str, latency: float) -> Iterator[str]:
+        # Half the latency before the first token, the rest spread over the chunks
+        time.sleep(latency / 2)
+        chunks = [content[i:i + self.stream_chunk_chars] for i in range(0, len(content), self.stream_chunk_chars)]
+        for chunk in chunks:
+            yield chunk
+            time.sleep(latency / 2 / max(len(chunks), 1))
+
+    def _draw(self, prompt: str, timeout: Optional[float], sleep: bool = True):
+        """Pick this call's latency and response, raising if it fails or times out
+
+        With sleep=False nothing blocks or raises: a failed call comes back with
+        content None and the caller does the waiting.
+        """
+        with self._lock:
+            self.calls += 1
+            rng = random.Random(self._rng.random())
+            fails = rng.random() < self.error_rate
+            malformed = rng.random() < self.malformed_rate
+            if fails:
+                self.errors += 1
+            elif malformed:
+                self.malformed += 1
+        latency = max(self.latency(rng), 0.0)
+
+        if not sleep and fails:
+            return latency, None
+        if not sleep and timeout is not None and latency > timeout:
+            return latency, ""
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"fake LLM timed out after {timeout:.2f}s")
+        if fails:
+            time.sleep(latency)
+            raise FakeLLMError("injected LLM failure")
+
+        batch_symbols = self._BATCH_SYMBOL.findall(prompt)
+        if batch_symbols:
+            content = json.dumps([{"symbol": symbol, **self.decide(symbol, rng)} for symbol in batch_symbols], indent=2)
+        else:
+            match = self._SINGLE_SYMBOL.search(prompt)
+            content = json.dumps(self.decide(match.group(1) if match else "", rng), indent=2)
+
+        if malformed:
+            content = self._malform(content, rng)
+        return latency, content
+
+    @staticmethod
+    def _malform(content: str, rng: random.Random) -> str:
+        kind = rng.randrange(3)
+        if kind == 0:
+            return content[:rng.randrange(1, len(content))]  # cut off mid-response
+        if kind == 1:
+            return content.replace('"', "'")  # not JSON
+        return "I'd rather not give financial advice."
+
+    @staticmethod
+    def _random_decision(symbol: str, rng: random.Random) -> Dict:
+        action = rng.choice(("BUY", "SELL", "HOLD"))
+        return {
+            "action": action,
+            "confidence": round(rng.uniform(0.3, 0.95), 2),
+            "suggested_quantity": rng.randint(1, 10) if action != "HOLD" else None,
+            "reasoning": f"Simulated {action.lower()} signal for {symbol}",
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "malformed": self.malformed}
+
+
+def fake_client_from_env(env: Dict[str, str]) -> FakeLLMClient:
+    """FakeLLMClient configured by FAKE_LLM_* variables (median/p99 latency in ms, rates, seed)"""
+    seed = env.get("FAKE_LLM_SEED")
+    return FakeLLMClient(
+        latency=lognormal_latency(
+            float(env.get("FAKE_LLM_MEDIAN_MS", "400")) / 1000,
+            float(env.get("FAKE_LLM_P99_MS", "2000")) / 1000
+        ),
+        error_rate=float(env.get("FAKE_LLM_ERROR_RATE", "0")),
+        malformed_rate=float(env.get("FAKE_LLM_MALFORMED_RATE", "0")),
+        seed=int(seed) if seed else None
+    )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+🧪 Offline load test for the decision path
+Runs make_decision against the in-process fake LLM and simulated market data,
+then reports throughput, tail latency and how often the agent fell back.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from llm_client import FakeLLMClient, lognormal_latency
+from market_data_service import MarketDataService
+from trading_agent import TradingAgent
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def run(args) -> Dict:
+    client = FakeLLMClient(
+        latency=lognormal_latency(args.median_ms / 1000, args.p99_ms / 1000),
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+    agent = TradingAgent(
+        name="LoadTest",
+        initial_balance=1_000_000,
+        decision_ttl=0,  # every decision goes to the LLM
+        llm_deadline=args.deadline,
+        llm_client=client
+    )
+
+    # Simulated bars only - no network
+    market_data = {
+        symbol: MarketDataService.generate_realistic_data(symbol, "1d", "5m", seed=args.seed + i)
+        for i, symbol in enumerate(args.symbols)
+    }
+    jobs = [args.symbols[i % len(args.symbols)] for i in range(args.decisions)]
+
+    def decide(symbol: str):
+        start = time.perf_counter()
+        analysis = agent.analyze(symbol, market_data[symbol])
+        return time.perf_counter() - start, analysis["decision"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(decide, jobs))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in results]
+    fallbacks = sum(1 for _, decision in results if "ai_full_response" not in decision)
+    return {
+        "decisions": len(results),
+        "wall_seconds": wall,
+        "throughput": len(results) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000 if latencies else 0.0,
+        "fallbacks": fallbacks,
+        "fake_llm": client.stats(),
+        "retries": agent.llm_stats()["retries"],
+    }
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Offline load test for TradingAgent decisions')
+    parser.add_argument('--decisions', type=int, default=200, help='Decisions to make (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Decisions in flight (default: 8)')
+    parser.add_argument('--symbols', nargs='+', default=['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'NVDA'], help='Symbols to cycle through')
+    parser.add_argument('--median-ms', type=float, default=400, help='Median fake LLM latency (default: 400)')
+    parser.add_argument('--p99-ms', type=float, default=2000, help='p99 fake LLM latency (default: 2000)')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Share of LLM calls that fail (default: 0.05)')
+    parser.add_argument('--malformed-rate', type=float, default=0.05, help='Share of LLM replies that are malformed (default: 0.05)')
+    parser.add_argument('--deadline', type=float, default=20.0, help='Per-decision LLM deadline in seconds (default: 20)')
+    parser.add_argument('--seed', type=int, default=int(os.getenv("FAKE_LLM_SEED", "7")), help='Random seed')
+
+    report = run(parser.parse_args())
+
+    retries = report["retries"]
+    print(f"\n{'='*80}")
+    print(f"🧪 LOAD TEST RESULTS")
+    print(f"{'='*80}")
+    print(f"📝 Decisions: {report['decisions']} in {report['wall_seconds']:.2f}s ({report['throughput']:.1f}/s)")
+    print(f"⏱️  Latency: p50 {report['p50_ms']:.0f}ms | p95 {report['p95_ms']:.0f}ms | p99 {report['p99_ms']:.0f}ms | max {report['max_ms']:.0f}ms")
+    print(f"🛟 Fallbacks: {report['fallbacks']} ({report['fallbacks'] / max(report['decisions'], 1):.1%})")
+    print(f"🔁 Retries: {retries['retries']} | gave up: {retries['gave_up']} | deadline exceeded: {retries['deadline_exceeded']}")
+    print(f"🤖 Fake LLM: {report['fake_llm']['calls']} calls, {report['fake_llm']['errors']} errors, {report['fake_llm']['malformed']} malformed")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
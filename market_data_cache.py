@@ -0,0 +1,155 @@
+"""
+In-memory cache for market data lookups
+- TTL depends on the bar interval (short for 1m bars, longer for daily bars)
+- Bounded size with least-recently-used eviction
+- Identical requests in flight at the same time share one fetch
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+
+class MarketDataCache:
+    """Thread-safe TTL + LRU cache with single-flight loading"""
+
+    # Seconds a cached entry stays fresh, per bar interval
+    DEFAULT_TTLS = {
+        "1m": 5,
+        "5m": 30,
+        "15m": 60,
+        "1h": 120,
+        "1d": 300,
+        "quote": 5,
+    }
+    DEFAULT_TTL = 60
+
+    def __init__(self, max_entries: int = 256, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self._entries = OrderedDict()  # {key: (expires_at, value)}
+        self._inflight = {}  # {key: _Flight}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def ttl_for(self, interval: str) -> float:
+        """TTL in seconds for a bar interval"""
+        return self.ttls.get(interval, self.DEFAULT_TTL)
+
+    def get(self, key: Hashable):
+        """Return a fresh cached value or None"""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: Hashable, value, ttl: float):
+        """Store a value for ttl seconds"""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Optional[Dict]], ttl: float):
+        """Return the cached value, or run loader once for all concurrent callers of key"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._inflight[key] = flight
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            flight.value = value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and flight.value is not None:
+                    self._store(key, flight.value, ttl)
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+        return value
+
+    def note_coalesced(self):
+        """Count a request that waited on another caller's load instead of loading itself"""
+        with self._lock:
+            self.coalesced += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "inflight": len(self._inflight),
+            }
+
+    def _lookup(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key: Hashable, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
@@ -0,0 +1,120 @@
+"""
+Columnar OHLCV bars
+Prices and volumes live in contiguous NumPy arrays; conversion to Python
+lists / JSON only happens at the API boundary (see OHLCVFrame.to_dict).
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class OHLCVFrame:
+    """OHLCV bars as contiguous float64/int64 column arrays
+
+    Timestamps are int64 seconds since the epoch, taken from the exchange
+    wall clock with no timezone (the same clock the dates are displayed in).
+    """
+
+    __slots__ = ("timestamps", "open", "high", "low", "close", "volume", "intraday")
+
+    def __init__(self, timestamps, open, high, low, close, volume, intraday: bool = False):
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64)
+        self.intraday = intraday
+
+        n = len(self.timestamps)
+        if not all(len(col) == n for col in (self.open, self.high, self.low, self.close, self.volume)):
+            raise ValueError("OHLCV columns must all have the same length")
+
+    @classmethod
+    def empty(cls, intraday: bool = False) -> "OHLCVFrame":
+        """A frame with no bars"""
+        return cls([], [], [], [], [], [], intraday=intraday)
+
+    @classmethod
+    def from_dates(cls, dates: List[str], open, high, low, close, volume, intraday: bool = False) -> "OHLCVFrame":
+        """Build a frame from ISO date strings ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM[:SS]')"""
+        timestamps = np.array(dates, dtype="datetime64[s]").astype(np.int64)
+        return cls(timestamps, open, high, low, close, volume, intraday=intraday)
+
+    @classmethod
+    def from_dataframe(cls, df, intraday: bool = False) -> "OHLCVFrame":
+        """Build a frame from a pandas frame with a DatetimeIndex and Open/High/Low/Close/Volume columns"""
+        index = df.index
+        if getattr(index, "tz", None) is not None:
+            # Keep the exchange wall clock, drop the timezone
+            index = index.tz_localize(None)
+
+        return cls(
+            index.values.astype("datetime64[s]").astype(np.int64),
+            df["Open"].to_numpy(dtype=np.float64),
+            df["High"].to_numpy(dtype=np.float64),
+            df["Low"].to_numpy(dtype=np.float64),
+            df["Close"].to_numpy(dtype=np.float64),
+            np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64)),
+            intraday=intraday
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, key: slice) -> "OHLCVFrame":
+        """Slice bars by position - returns views, not copies"""
+        if not isinstance(key, slice):
+            raise TypeError("OHLCVFrame only supports slicing")
+        return OHLCVFrame(
+            self.timestamps[key], self.open[key], self.high[key],
+            self.low[key], self.close[key], self.volume[key],
+            intraday=self.intraday
+        )
+
+    def tail(self, n: int) -> "OHLCVFrame":
+        """Last n bars"""
+        return self[max(len(self) - n, 0):]
+
+    def since(self, timestamp: int) -> "OHLCVFrame":
+        """Bars at or after a timestamp"""
+        return self[int(np.searchsorted(self.timestamps, timestamp, side="left")):]
+
+    def after(self, timestamp: int) -> "OHLCVFrame":
+        """Bars strictly after a timestamp"""
+        return self[int(np.searchsorted(self.timestamps, timestamp, side="right")):]
+
+    def concat(self, other: "OHLCVFrame") -> "OHLCVFrame":
+        """A new frame with other's bars appended"""
+        return OHLCVFrame(
+            np.concatenate((self.timestamps, other.timestamps)),
+            np.concatenate((self.open, other.open)),
+            np.concatenate((self.high, other.high)),
+            np.concatenate((self.low, other.low)),
+            np.concatenate((self.close, other.close)),
+            np.concatenate((self.volume, other.volume)),
+            intraday=self.intraday
+        )
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[-1]) if len(self) else None
+
+    def dates(self) -> List[str]:
+        """Display dates ('YYYY-MM-DD HH:MM' intraday, 'YYYY-MM-DD' daily)"""
+        as_datetime = self.timestamps.astype("datetime64[s]")
+        if self.intraday:
+            return np.char.replace(np.datetime_as_string(as_datetime, unit="m"), "T", " ").tolist()
+        return np.datetime_as_string(as_datetime, unit="D").tolist()
+
+    def to_dict(self) -> Dict[str, List]:
+        """Plain-list columns in the API's historical_data shape"""
+        return {
+            "Date": self.dates(),
+            "Open": self.open.tolist(),
+            "High": self.high.tolist(),
+            "Low": self.low.tolist(),
+            "Close": self.close.tolist(),
+            "Volume": self.volume.tolist()
+        }
@@ -0,0 +1,150 @@
+"""
+Compact, feature-based prompts for trading decisions
+Summarizes the OHLCV history as a handful of features (multi-horizon
+returns, volatility, position in the window's range, volume z-score) and
+renders them in a terse template that is trimmed to a token budget.
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Return horizons in bars
+HORIZONS = (1, 5, 20)
+# Bars used for volatility and the volume baseline
+LOOKBACK = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting and for streams without usage"""
+    return math.ceil(len(text) / 4)
+
+
+class PromptBuilder:
+    """Builds single-symbol and batch decision prompts within a token budget"""
+
+    SINGLE_HEADER = "You are a trading analyst. Decide BUY, SELL or HOLD for this stock."
+    SINGLE_REPLY = ('Reply with JSON only, fields in this order: {"action":"BUY|SELL|HOLD","confidence":0-1,'
+                    '"suggested_quantity":shares or null,"reasoning":"max 25 words"}')
+    BATCH_HEADER = "You are a trading analyst. Decide BUY, SELL or HOLD for each stock."
+    BATCH_REPLY = ('Reply with only a JSON array, one object per symbol: [{"symbol":"TICKER","action":"BUY|SELL|HOLD",'
+                   '"confidence":0-1,"suggested_quantity":shares or null,"reasoning":"max 20 words"}]')
+
+    def __init__(self, max_tokens: int = 160, batch_tokens_per_symbol: int = 60):
+        self.max_tokens = max_tokens
+        self.batch_tokens_per_symbol = batch_tokens_per_symbol
+
+    @staticmethod
+    def features(market_data: Dict) -> Dict:
+        """Feature vector from the bars (falls back to the summary fields without them)"""
+        bars = market_data.get("bars")
+        price = market_data["current_price"]
+        if bars is None or len(bars) < 2:
+            return {
+                "price": price,
+                "bars": len(bars) if bars is not None else 0,
+                "returns": {1: market_data["change_percent"]},
+            }
+
+        close = bars.close
+        n = len(close)
+        features = {
+            "price": float(close[-1]),
+            "bars": n,
+            "returns": {
+                h: float((close[-1] / close[-1 - h] - 1) * 100)
+                for h in HORIZONS if n > h and close[-1 - h] > 0
+            },
+        }
+
+        recent = close[-(LOOKBACK + 1):]
+        if len(recent) >= 3 and np.all(recent > 0):
+            features["volatility"] = float(np.std(np.diff(np.log(recent))) * 100)
+
+        low, high = float(bars.low.min()), float(bars.high.max())
+        features["low"], features["high"] = low, high
+        if high > low:
+            features["range_position"] = (float(close[-1]) - low) / (high - low)
+
+        baseline = bars.volume[-(LOOKBACK + 1):-1].astype(np.float64)
+        if len(baseline) >= 5 and baseline.std() > 0:
+            features["volume_z"] = float((bars.volume[-1] - baseline.mean()) / baseline.std())
+
+        return features
+
+    def decision_prompt(self, market_data: Dict, holdings: int, avg_price: float, balance: float) -> str:
+        """Single-symbol prompt - actionable fields come first in the reply so streaming can act early"""
+        features = self.features(market_data)
+        symbol_line = f"Symbol: {market_data['symbol']}"
+        described = f"{symbol_line} ({market_data['company_name']}, {market_data['sector']})"
+
+        lines = self._fit([
+            self.SINGLE_HEADER,
+            symbol_line,
+            self._feature_text(features, self._segments(features)),
+            self._position_text(holdings, avg_price, balance),
+            self.SINGLE_REPLY,
+        ], features, 2)
+
+        # Company and sector only if they still fit the budget
+        with_context = [lines[0], described, *lines[2:]]
+        if estimate_tokens("\n".join(with_context)) <= self.max_tokens:
+            lines = with_context
+        return "\n".join(lines)
+
+    def batch_prompt(self, market_data_list: List[Dict], holdings: Dict[str, Tuple[int, float]], balance: float) -> str:
+        """One prompt for several symbols, one compact line each"""
+        rows = []
+        for market_data in market_data_list:
+            symbol = market_data["symbol"]
+            features = self.features(market_data)
+            quantity, avg_price = holdings.get(symbol, (0, 0.0))
+            position = f"; holding {quantity} @ {avg_price:.2f}" if quantity else ""
+
+            segments = self._segments(features)
+            row = f"- {symbol}: {self._feature_text(features, segments)}{position}"
+            while estimate_tokens(row) > self.batch_tokens_per_symbol and len(segments) > 2:
+                segments = segments[:-1]
+                row = f"- {symbol}: {self._feature_text(features, segments)}{position}"
+            rows.append(row)
+
+        return "\n".join([self.BATCH_HEADER, f"Cash: ${balance:,.0f}", *rows, self.BATCH_REPLY])
+
+    def _fit(self, lines: List[str], features: Dict, feature_line: int) -> List[str]:
+        """Drop the least important feature segments until the prompt fits the budget"""
+        segments = self._segments(features)
+        while estimate_tokens("\n".join(lines)) > self.max_tokens and len(segments) > 2:
+            segments = segments[:-1]
+            lines[feature_line] = self._feature_text(features, segments)
+        return lines
+
+    @staticmethod
+    def _segments(features: Dict) -> List[str]:
+        """Feature names in order of importance (price and returns are always kept)"""
+        return [name for name in ("price", "returns", "range_position", "volatility", "volume_z") if name in features]
+
+    @staticmethod
+    def _feature_text(features: Dict, segments: List[str]) -> str:
+        parts = []
+        for name in segments:
+            if name == "price":
+                parts.append(f"price {features['price']:.2f}")
+            elif name == "returns":
+                returns = features["returns"]
+                parts.append("return " + " ".join(f"{h}b {r:+.2f}%" for h, r in returns.items()))
+            elif name == "range_position":
+                parts.append(
+                    f"at {features['range_position']:.2f} of {features['bars']}-bar range "
+                    f"{features['low']:.2f}-{features['high']:.2f}"
+                )
+            elif name == "volatility":
+                parts.append(f"vol {features['volatility']:.2f}%/bar")
+            elif name == "volume_z":
+                parts.append(f"volume z {features['volume_z']:+.1f}")
+        return "; ".join(parts)
+
+    @staticmethod
+    def _position_text(holdings: int, avg_price: float, balance: float) -> str:
+        held = f"{holdings} shares @ {avg_price:.2f}" if holdings else "no shares"
+        return f"Position: {held}; cash ${balance:,.0f}"
@@ -0,0 +1,175 @@
+"""
+Rate-limit-aware request scheduling
+Token buckets for an API's per-minute and per-day quotas, handed out by
+priority: held positions first, then scalping symbols, then chart views.
+When a request can't get budget in time it is denied straight away so the
+caller can route it to the next data source.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+# Request priorities (lower is more important)
+PRIORITY_HELD = 0
+PRIORITY_SCALPING = 1
+PRIORITY_CHART = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_HELD: "held",
+    PRIORITY_SCALPING: "scalping",
+    PRIORITY_CHART: "chart",
+}
+
+
+class RateLimitScheduler:
+    """Per-minute token bucket plus a daily quota, shared by all callers of one API"""
+
+    # Share of the daily quota kept back from each priority for more important requests
+    DAILY_RESERVE = {
+        PRIORITY_HELD: 0.0,
+        PRIORITY_SCALPING: 0.1,
+        PRIORITY_CHART: 0.4,
+    }
+
+    # Seconds each priority will queue for a per-minute token before giving up
+    MAX_WAIT = {
+        PRIORITY_HELD: 12.0,
+        PRIORITY_SCALPING: 3.0,
+        PRIORITY_CHART: 0.0,
+    }
+
+    def __init__(self, name: str, per_minute: int, per_day: int):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+
+        self._tokens = float(per_minute)
+        self._refill_rate = per_minute / 60.0
+        self._refilled_at = time.monotonic()
+        self._day = date.today()
+        self._used_today = 0
+
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+        self.granted = {p: 0 for p in PRIORITY_NAMES}
+        self.denied = {p: 0 for p in PRIORITY_NAMES}
+        self.throttled = 0
+
+    def acquire(self, priority: int = PRIORITY_CHART, max_wait: Optional[float] = None) -> bool:
+        """Block until a request slot is granted; False means route elsewhere now"""
+        if max_wait is None:
+            max_wait = self.MAX_WAIT.get(priority, 0.0)
+        deadline = time.monotonic() + max_wait
+
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    wait = self._try_take(ticket, deadline)
+                    if wait is None:
+                        return True
+                    if wait < 0:
+                        return False
+                    self._cond.wait(wait)
+            finally:
+                self._leave(ticket)
+
+    async def acquire_async(self, priority: int = PRIORITY_CHART, max_wait: Optional[float] = None) -> bool:
+        """Event-loop version of acquire"""
+        if max_wait is None:
+            max_wait = self.MAX_WAIT.get(priority, 0.0)
+        deadline = time.monotonic() + max_wait
+
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket, deadline)
+                if wait is None:
+                    return True
+                if wait < 0:
+                    return False
+                await asyncio.sleep(wait)
+        finally:
+            with self._cond:
+                self._leave(ticket)
+
+    def penalize(self, message: str = ""):
+        """The API reported throttling - spend the remaining budget so callers go elsewhere"""
+        with self._cond:
+            self._refill()
+            self.throttled += 1
+            self._tokens = 0.0
+            if "per day" in message.lower() or "daily" in message.lower():
+                self._used_today = self.per_day
+
+    def stats(self) -> Dict:
+        """Budget and per-priority grant/deny counters"""
+        with self._cond:
+            self._refill()
+            return {
+                "source": self.name,
+                "per_minute": self.per_minute,
+                "per_day": self.per_day,
+                "tokens_available": round(self._tokens, 2),
+                "used_today": self._used_today,
+                "queued": len(self._queue),
+                "throttled": self.throttled,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                "denied": {PRIORITY_NAMES[p]: n for p, n in self.denied.items()},
+            }
+
+    def _try_take(self, ticket, deadline: float) -> Optional[float]:
+        """Take a token for ticket if it's its turn; else seconds to wait, or -1 to give up"""
+        priority = ticket[0]
+        self._refill()
+
+        daily_limit = self.per_day * (1 - self.DAILY_RESERVE.get(priority, 0.0))
+        if self._used_today >= daily_limit:
+            self.denied[priority] += 1
+            return -1
+
+        if self._queue[0] == ticket and self._tokens >= 1:
+            self._tokens -= 1
+            self._used_today += 1
+            self.granted[priority] += 1
+            return None
+
+        now = time.monotonic()
+        remaining = deadline - now
+        # Time until this ticket could be served if everyone ahead of it goes first
+        ahead = sum(1 for queued in self._queue if queued < ticket)
+        needed = (ahead + 1 - self._tokens) / self._refill_rate if self._refill_rate else float("inf")
+        if needed > remaining:
+            self.denied[priority] += 1
+            return -1
+
+        return max(min(needed, remaining), 0.01)
+
+    def _leave(self, ticket):
+        try:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+        except ValueError:
+            pass
+        self._cond.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.per_minute, self._tokens + (now - self._refilled_at) * self._refill_rate)
+        self._refilled_at = now
+
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self._used_today = 0
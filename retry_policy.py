@@ -0,0 +1,177 @@
+"""
+Bounded retry policy for slow or flaky remote calls
+A fixed number of attempts, exponential backoff with full jitter, and an
+overall deadline per operation; every attempt's latency and outcome is
+recorded so slow calls show up in the stats.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class RetryExhausted(Exception):
+    """Every allowed attempt failed, or the deadline passed first"""
+
+    def __init__(self, attempts: int, last_error: Optional[BaseException], deadline_exceeded: bool):
+        reason = "deadline exceeded" if deadline_exceeded else "attempts exhausted"
+        super().__init__(f"{reason} after {attempts} attempt(s): {last_error}")
+        self.attempts = attempts
+        self.last_error = last_error
+        self.deadline_exceeded = deadline_exceeded
+
+
+class RetryPolicy:
+    """Runs a call with bounded retries inside a per-operation deadline"""
+
+    # Don't start an attempt with less time than this left before the deadline
+    MIN_ATTEMPT_TIME = 0.5
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        deadline: float = 20.0,
+        attempt_timeout: float = 10.0,
+        seed: Optional[int] = None,
+        history: int = 200
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._attempts = deque(maxlen=history)  # [(attempt_number, ok, latency_seconds)]
+
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.deadline_exceeded = 0
+
+    def run(self, call: Callable[[float], T]) -> T:
+        """Call call(timeout_seconds) until it returns; raises RetryExhausted when out of attempts or time"""
+        deadline = time.monotonic() + self.deadline
+        last_error = None
+        attempt = 0
+
+        with self._lock:
+            self.calls += 1
+
+        while attempt < self.max_attempts:
+            remaining = deadline - time.monotonic()
+            if remaining < self.MIN_ATTEMPT_TIME:
+                break
+
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                result = call(min(self.attempt_timeout, remaining))
+            except Exception as e:
+                self._record(attempt, False, time.perf_counter() - start)
+                last_error = e
+                print(f"Attempt {attempt}/{self.max_attempts} failed: {e!r}")
+            else:
+                self._record(attempt, True, time.perf_counter() - start)
+                return result
+
+            if attempt < self.max_attempts:
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay + self.MIN_ATTEMPT_TIME > deadline:
+                    break
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+        deadline_exceeded = attempt < self.max_attempts
+        with self._lock:
+            self.gave_up += 1
+            if deadline_exceeded:
+                self.deadline_exceeded += 1
+        raise RetryExhausted(attempt, last_error, deadline_exceeded)
+
+    async def run_async(self, call: Callable[[float], Awaitable[T]]) -> T:
+        """Event-loop version of run - call(timeout_seconds) returns an awaitable"""
+        deadline = time.monotonic() + self.deadline
+        last_error = None
+        attempt = 0
+
+        with self._lock:
+            self.calls += 1
+
+        while attempt < self.max_attempts:
+            remaining = deadline - time.monotonic()
+            if remaining < self.MIN_ATTEMPT_TIME:
+                break
+
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(call(min(self.attempt_timeout, remaining)), remaining)
+            except Exception as e:
+                self._record(attempt, False, time.perf_counter() - start)
+                last_error = e
+                print(f"Attempt {attempt}/{self.max_attempts} failed: {e!r}")
+            else:
+                self._record(attempt, True, time.perf_counter() - start)
+                return result
+
+            if attempt < self.max_attempts:
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay + self.MIN_ATTEMPT_TIME > deadline:
+                    break
+                with self._lock:
+                    self.retries += 1
+                await asyncio.sleep(delay)
+
+        deadline_exceeded = attempt < self.max_attempts
+        with self._lock:
+            self.gave_up += 1
+            if deadline_exceeded:
+                self.deadline_exceeded += 1
+        raise RetryExhausted(attempt, last_error, deadline_exceeded)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay after the given (1-based) failed attempt"""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        with self._lock:
+            return self._rng.uniform(0, ceiling)
+
+    def stats(self) -> Dict:
+        """Attempt counters plus latency percentiles over recent attempts"""
+        with self._lock:
+            attempts = list(self._attempts)
+            latencies = sorted(latency for _, _, latency in attempts)
+
+            def percentile(p: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "deadline_exceeded": self.deadline_exceeded,
+                "attempt_failure_rate": sum(1 for _, ok, _ in attempts if not ok) / len(attempts) if attempts else 0.0,
+                "latency_p50_ms": percentile(0.5),
+                "latency_p95_ms": percentile(0.95),
+                "recent_attempts": [
+                    {"attempt": n, "ok": ok, "latency_ms": round(latency * 1000, 1)}
+                    for n, ok, latency in attempts[-10:]
+                ],
+                "max_attempts": self.max_attempts,
+                "deadline_seconds": self.deadline,
+            }
+
+    def _record(self, attempt: int, ok: bool, latency: float):
+        with self._lock:
+            self._attempts.append((attempt, ok, latency))
@@ -6,18 +6,42 @@ Trades every 1-2 minutes based on AI decisions
 
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional
 from trading_agent import TradingAgent
+from bar_scheduler import BarScheduler, MarketSession
+from prompt_builder import PromptBuilder
+from symbol_scheduler import SymbolScheduler
+from trade_journal import TradeJournal
+from trade_store import TradeStore
 from market_data_service import MarketDataService
+from rate_limiter import PRIORITY_CHART, PRIORITY_SCALPING
 
 
 class ScalpingBot:
     """Automated scalping bot that trades at high frequency"""
 
-    def __init__(self, initial_balance: float, symbols: list, interval: str = "1m"):
+    def __init__(
+        self,
+        initial_balance: float,
+        symbols: list,
+        interval: str = "1m",
+        max_concurrency: int = 4,
+        llm_batch_size: int = 1,
+        market_hours_only: bool = True,
+        max_symbols_per_cycle: Optional[int] = None,
+        journal_dir: Optional[str] = "scalping_journal",
+        fsync_batch: int = 1,
+        history_db: Optional[str] = "scalping_history.db"
+    ):
         self.symbols = symbols
         self.interval = interval
+        self.max_concurrency = max(1, max_concurrency)
+        # Symbols per LLM call: larger batches mean fewer calls per minute but slower answers
+        self.llm_batch_size = max(1, llm_batch_size)
         self.running = False
+        self.last_cycle_timings: Dict = {}
 
         # Initialize agent
         api_key = os.getenv("MISTRAL_API_KEY", "")
@@ -27,6 +51,14 @@ class ScalpingBot:
             api_key=api_key
         )
 
+        # Every trade and decision goes to a write-ahead journal, so a crash doesn't lose the session
+        resumed = False
+        if journal_dir:
+            resumed = self.agent.attach_journal(TradeJournal(journal_dir, fsync_batch=fsync_batch))
+        # Full trade and decision history in SQLite; only recent trades stay in memory
+        if history_db:
+            self.agent.attach_trade_store(TradeStore(history_db), "scalping_bot")
+
         # Determine check frequency based on interval
         self.check_seconds = {
             "1m": 60,
@@ -34,13 +66,26 @@ class ScalpingBot:
             "15m": 900
         }.get(interval, 60)
 
+        # Wake right after each bar closes; sleep through closed sessions unless told otherwise
+        self.scheduler = BarScheduler(self.check_seconds, session=MarketSession() if market_hours_only else None)
+        # Which symbols each bar: held and volatile ones every bar, quiet ones less often
+        self.symbol_scheduler = SymbolScheduler(symbols, self.check_seconds, max_per_cycle=max_symbols_per_cycle)
+
         print(f"\n{'='*80}")
         print(f"🤖 SCALPING BOT INITIALIZED")
         print(f"{'='*80}")
         print(f"💰 Initial Balance: ${initial_balance:,.2f}")
         print(f"📊 Symbols: {', '.join(symbols)}")
-        print(f"⏱️  Interval: {interval} (checking every {self.check_seconds}s)")
+        print(f"⏱️  Interval: {interval} (checking after every bar close)")
+        print(f"🕘 Market hours only: {'✅ Yes' if market_hours_only else '❌ No'}")
+        print(f"🧵 Concurrency: {self.max_concurrency} symbols at a time")
+        print(f"🎯 Symbols per cycle: {max_symbols_per_cycle or 'all due'} (adaptive cadence)")
+        print(f"📦 LLM batch size: {self.llm_batch_size} symbol(s) per call")
         print(f"🔑 Mistral AI: {'✅ Enabled' if api_key else '⚠️  Using fallback strategy'}")
+        if resumed:
+            print(f"📓 Journal: {journal_dir} (resumed: ${self.agent.balance:,.2f} cash, {self.agent.trade_count} trades)")
+        else:
+            print(f"📓 Journal: {journal_dir or '❌ Disabled'}")
         print(f"{'='*80}\n")
 
     def run(self):
@@ -51,60 +96,178 @@ class ScalpingBot:
         print("▶️  Starting automated trading...")
         print("Press Ctrl+C to stop\n")
 
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="scalping")
         try:
             while self.running:
+                bar_close = self.scheduler.next_bar()
+                if bar_close is None:
+                    break
+
                 cycle += 1
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
                 print(f"\n{'─'*80}")
-                print(f"🔄 Cycle #{cycle} - {timestamp}")
+                print(f"🔄 Cycle #{cycle} - {timestamp} (bar closed {bar_close:%H:%M:%S})")
                 print(f"{'─'*80}")
 
-                # Rotate through symbols
-                for symbol in self.symbols:
-                    self._trade_symbol(symbol)
+                self._run_cycle(executor, bar_close)
 
                 # Show performance
                 self._show_performance()
 
-                # Wait for next cycle
-                print(f"\n⏳ Waiting {self.check_seconds} seconds until next cycle...")
-                time.sleep(self.check_seconds)
-
         except KeyboardInterrupt:
             print("\n\n🛑 Stopping bot...")
             self._show_final_stats()
         except Exception as e:
             print(f"\n❌ Error: {e}")
             self._show_final_stats()
+        finally:
+            executor.shutdown(wait=False)
+            self.agent.close_journal()
 
-    def _trade_symbol(self, symbol: str):
-        """Analyze and potentially trade a symbol"""
-        print(f"\n📊 Analyzing {symbol}...")
-
+    def stop(self):
+        """Stop after the current cycle (or right away if waiting for a bar)"""
+        self.running = False
+        self.scheduler.stop()
+
+    def _run_cycle(self, executor: ThreadPoolExecutor, bar_close: Optional[datetime] = None):
+        """Analyze the symbols due this bar concurrently, then trade on the results one at a time in symbol order"""
+        cycle_start = time.perf_counter()
+        now = bar_close.timestamp() if bar_close is not None else time.time()
+
+        due = set(self.symbol_scheduler.due(now))
+        symbols = [symbol for symbol in self.symbols if symbol in due]
+        if not symbols:
+            print("💤 No symbols due this bar")
+            self.last_cycle_timings = {"wall_ms": 0.0, "batch_fetch_ms": 0.0, "analyze_ms": 0.0, "symbols": {}}
+            return
+        print(f"🎯 Due this bar: {', '.join(symbols)}")
+
+        # Fetch the due symbols in one bulk request
+        start = time.perf_counter()
+        market_data = MarketDataService.get_market_data_batch(symbols, period="1d", interval=self.interval, priority=PRIORITY_SCALPING)
+        batch_fetch_seconds = time.perf_counter() - start
+
+        # Analysis only reads agent state, so it can overlap; trades can't
+        if self.llm_batch_size > 1:
+            analyses = self._analyze_batched(executor, symbols, market_data)
+        else:
+            futures = [executor.submit(self._analyze_symbol, symbol, market_data.get(symbol)) for symbol in symbols]
+            analyses = [future.result() for future in futures]
+        analyze_seconds = time.perf_counter() - start - batch_fetch_seconds
+
+        symbol_timings = {}
+        for symbol, analysis in zip(symbols, analyses):
+            if analysis is None:
+                self.symbol_scheduler.update(symbol, now, symbol in self.agent.portfolio, None, None)
+                continue
+            start = time.perf_counter()
+            self._trade_symbol(analysis)
+            symbol_timings[symbol] = {**analysis["timings"], "act_ms": round((time.perf_counter() - start) * 1000, 1)}
+            if bar_close is not None:
+                # How long after the bar closed this decision went out
+                symbol_timings[symbol]["lag_ms"] = round(self.scheduler.record_lag(bar_close) * 1000, 1)
+
+            # Poll again sooner if we now hold it or it's moving, later if it's quiet
+            features = PromptBuilder.features(analysis["market_data"])
+            returns = features["returns"]
+            self.symbol_scheduler.update(
+                symbol,
+                now,
+                symbol in self.agent.portfolio,
+                features.get("volatility"),
+                returns[max(returns)] if returns else None
+            )
+
+        self.last_cycle_timings = {
+            "wall_ms": round((time.perf_counter() - cycle_start) * 1000, 1),
+            "batch_fetch_ms": round(batch_fetch_seconds * 1000, 1),
+            "analyze_ms": round(analyze_seconds * 1000, 1),
+            "symbols": symbol_timings,
+        }
+        self._show_cycle_timings()
+
+    def _analyze_symbol(self, symbol: str, data: Optional[Dict] = None) -> Optional[Dict]:
+        """Fetch and analyze one symbol (runs on a worker thread)"""
         try:
-            # Get market data
-            data = MarketDataService.get_market_data(symbol, period="1d", interval=self.interval)
+            # Get market data (unless it was already fetched for the whole cycle)
+            if data is None:
+                data = MarketDataService.get_market_data(symbol, period="1d", interval=self.interval, priority=PRIORITY_SCALPING)
 
             if not data:
                 print(f"  ❌ Could not fetch data for {symbol}")
-                return
+                return None
 
-            # Make decision
-            decision = self.agent.make_decision(symbol)
-
-            if not decision:
+            # Analyze the bars fetched above rather than fetching daily bars again
+            analysis = self.agent.analyze(symbol, data, period="1d", interval=self.interval)
+            if not analysis:
                 print(f"  ❌ Could not make decision for {symbol}")
-                return
+            return analysis
 
-            print(f"  💭 Decision: {decision['action']} (Confidence: {decision['confidence']:.0%})")
+        except Exception as e:
+            print(f"  ❌ Error analyzing {symbol}: {e}")
+            return None
+
+    def _analyze_batched(self, executor: ThreadPoolExecutor, symbols: List[str], market_data: Dict[str, Dict]) -> List[Optional[Dict]]:
+        """Analyze symbols llm_batch_size at a time (one LLM call per chunk); results in symbol order"""
+        market_data = dict(market_data)
+        missing = [symbol for symbol in symbols if not market_data.get(symbol)]
+        fetches = {
+            symbol: executor.submit(MarketDataService.get_market_data, symbol, "1d", self.interval, PRIORITY_SCALPING)
+            for symbol in missing
+        }
+        for symbol, future in fetches.items():
+            try:
+                market_data[symbol] = future.result()
+            except Exception as e:
+                print(f"  ❌ Error fetching {symbol}: {e}")
+
+        available = [symbol for symbol in symbols if market_data.get(symbol)]
+        for symbol in symbols:
+            if symbol not in available:
+                print(f"  ❌ Could not fetch data for {symbol}")
 
+        chunks = [available[i:i + self.llm_batch_size] for i in range(0, len(available), self.llm_batch_size)]
+        futures = [
+            executor.submit(self.agent.analyze_batch, {symbol: market_data[symbol] for symbol in chunk})
+            for chunk in chunks
+        ]
+
+        analyses = {}
+        for chunk, future in zip(chunks, futures):
+            try:
+                analyses.update(future.result())
+            except Exception as e:
+                print(f"  ❌ Error analyzing {', '.join(chunk)}: {e}")
+        return [analyses.get(symbol) for symbol in symbols]
+
+    def _trade_symbol(self, analysis: Dict):
+        """Potentially trade a symbol on its analysis (always on the bot thread)"""
+        symbol = analysis["symbol"]
+        try:
+            decision = self.agent.act(analysis)
+            print(f"  💭 Decision: {decision['action']} (Confidence: {decision['confidence']:.0%})")
         except Exception as e:
             print(f"  ❌ Error trading {symbol}: {e}")
 
+    def _show_cycle_timings(self):
+        """Display wall time for the cycle and per-symbol stage timings"""
+        timings = self.last_cycle_timings
+        print(f"\n⏱️  Cycle took {timings['wall_ms'] / 1000:.2f}s "
+              f"(batch fetch {timings['batch_fetch_ms']:.0f}ms, analysis {timings['analyze_ms']:.0f}ms)")
+        for symbol, stages in timings["symbols"].items():
+            lag = f" | {stages['lag_ms'] / 1000:.2f}s after bar close" if "lag_ms" in stages else ""
+            print(f"     {symbol}: fetch {stages['fetch_ms']:.0f}ms | analyze {stages['analyze_ms']:.0f}ms | act {stages['act_ms']:.0f}ms{lag}")
+
+        scheduling = self.scheduler.stats()
+        if scheduling["bars"]:
+            print(f"     Decision lag: p50 {scheduling['lag_p50_ms'] / 1000:.2f}s | p95 {scheduling['lag_p95_ms'] / 1000:.2f}s | "
+                  f"skipped bars: {scheduling['skipped_bars']}")
+
     def _show_performance(self):
         """Display current performance"""
-        stats = self.agent.get_performance_stats()
+        # Shown every cycle - must not stall the next bar waiting on the Alpha Vantage budget
+        stats = self.agent.get_performance_stats(priority=PRIORITY_CHART)
 
         portfolio_value = stats['total_portfolio_value']
         total_return = stats['total_return']
@@ -162,6 +325,14 @@ def main():
     parser.add_argument('--balance', type=float, default=10000, help='Initial balance (default: 10000)')
     parser.add_argument('--symbols', nargs='+', default=['AAPL', 'GOOGL', 'TSLA'], help='Symbols to trade')
     parser.add_argument('--interval', choices=['1m', '5m', '15m'], default='1m', help='Trading interval')
+    parser.add_argument('--concurrency', type=int, default=4, help='Symbols analyzed at the same time (default: 4)')
+    parser.add_argument('--llm-batch-size', type=int, default=1, help='Symbols analyzed per LLM call (default: 1)')
+    parser.add_argument('--all-hours', action='store_true', help='Keep trading outside regular US market hours')
+    parser.add_argument('--max-symbols-per-cycle', type=int, default=0, help='Cap on symbols polled per bar, most important first (default: no cap)')
+    parser.add_argument('--journal-dir', default='scalping_journal', help='Trade journal directory, resumed on restart (default: scalping_journal)')
+    parser.add_argument('--no-journal', action='store_true', help='Don\'t journal trades (state is only saved on exit)')
+    parser.add_argument('--fsync-batch', type=int, default=1, help='Journal records per fsync, 0 to leave it to the OS (default: 1)')
+    parser.add_argument('--history-db', default='scalping_history.db', help='SQLite trade and decision history (default: scalping_history.db)')
 
     args = parser.parse_args()
 
@@ -169,7 +340,14 @@ def main():
     bot = ScalpingBot(
         initial_balance=args.balance,
         symbols=args.symbols,
-        interval=args.interval
+        interval=args.interval,
+        max_concurrency=args.concurrency,
+        llm_batch_size=args.llm_batch_size,
+        market_hours_only=not args.all_hours,
+        max_symbols_per_cycle=args.max_symbols_per_cycle or None,
+        journal_dir=None if args.no_journal else args.journal_dir,
+        fsync_batch=args.fsync_batch,
+        history_db=args.history_db
     )
 
     bot.run()
@@ -0,0 +1,260 @@
+"""
+Health-tracking router for market data sources
+Keeps rolling latency/error stats per source, opens a circuit breaker after
+repeated failures, probes open sources again in the background (less often
+the longer they stay down; sources without a probe get their trial from the
+next real request), and orders sources by current health. Every served request is logged with its source
+and latency.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class SourceSkipped(Exception):
+    """A source declined a request without serving it (not configured, no API budget, throttled, ...)"""
+
+
+class SourceHealth:
+    """Rolling stats and circuit breaker state for one source"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int = 50, failure_threshold: int = 3, cooldown: float = 30.0, horizon: float = 300.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        # Outcomes older than this stop counting, so a demoted source gets another chance
+        self.horizon = horizon
+
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.results = deque(maxlen=window)  # [(recorded_at, ok, latency_seconds)]
+        self.total_requests = 0
+        self.total_failures = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a request may go to this source now (half-open admits a single trial)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """A trial was skipped without reaching the source"""
+        self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: float) -> bool:
+        """Record an outcome; returns True if this opened the circuit"""
+        self.results.append((time.monotonic(), ok, latency))
+        self.total_requests += 1
+        self._probe_in_flight = False
+
+        if ok:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            return False
+
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            was_open = self.state == self.OPEN
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            return not was_open
+        return False
+
+    def recent(self):
+        cutoff = time.monotonic() - self.horizon
+        return [(ok, latency) for at, ok, latency in self.results if at >= cutoff]
+
+    def error_rate(self) -> float:
+        recent = self.recent()
+        if not recent:
+            return 0.0
+        return sum(1 for ok, _ in recent if not ok) / len(recent)
+
+    def median_latency(self) -> float:
+        latencies = sorted(latency for ok, latency in self.recent() if ok)
+        return latencies[len(latencies) // 2] if latencies else 0.0
+
+    def score(self) -> float:
+        """Lower is healthier - median latency, inflated by the recent error rate"""
+        return (self.median_latency() + 0.1) * (1 + 10 * self.error_rate())
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "median_latency_ms": round(self.median_latency() * 1000, 1),
+            "consecutive_failures": self.consecutive_failures,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+        }
+
+
+class SourceRouter:
+    """Routes requests to sources in order of health, with circuit breakers"""
+
+    def __init__(
+        self,
+        sources: Iterable[str],
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        probes: Optional[Dict[str, Callable[[], object]]] = None,
+        probe_interval: float = 15.0,
+        max_probe_interval: float = 300.0,
+        log_size: int = 200
+    ):
+        self.sources = {
+            name: SourceHealth(name, failure_threshold=failure_threshold, cooldown=cooldown)
+            for name in sources
+        }
+        # Preference order when health is equal (e.g. before any stats exist)
+        self.preference = list(self.sources)
+        self.probes = probes or {}
+        self.probe_interval = probe_interval
+        self.max_probe_interval = max_probe_interval
+        self.served = deque(maxlen=log_size)
+
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+
+    def order(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """Source names sorted healthiest first; open circuits go last"""
+        names = list(names) if names is not None else list(self.preference)
+        with self._lock:
+            return sorted(
+                names,
+                key=lambda name: (
+                    self.sources[name].state == SourceHealth.OPEN,
+                    self.sources[name].score(),
+                    self.preference.index(name)
+                )
+            )
+
+    def call(self, name: str, fetch: Callable[[], Optional[Dict]]):
+        """Run one fetch against a source if its circuit allows it; None on failure or skip
+
+        Only a raised error counts against the source - a fetch that comes back empty
+        (unknown symbol, no new bars yet) still shows the source is up.
+        """
+        health = self.sources[name]
+        with self._lock:
+            if not health.allow():
+                return None
+
+        start = time.perf_counter()
+        try:
+            result = fetch()
+        except SourceSkipped:
+            with self._lock:
+                health.release()
+            return None
+        except Exception as e:
+            print(f"{name} failed: {e}")
+            self.record(name, False, time.perf_counter() - start)
+            return None
+        self.record(name, True, time.perf_counter() - start)
+        return result
+
+    async def call_async(self, name: str, fetch):
+        """Event-loop version of call - fetch is a zero-argument coroutine function"""
+        health = self.sources[name]
+        with self._lock:
+            if not health.allow():
+                return None
+
+        start = time.perf_counter()
+        try:
+            result = await fetch()
+        except SourceSkipped:
+            with self._lock:
+                health.release()
+            return None
+        except asyncio.CancelledError:
+            # Cut off by the caller's deadline - that counts against the source
+            self.record(name, False, time.perf_counter() - start)
+            raise
+        except Exception as e:
+            print(f"{name} failed: {e}")
+            self.record(name, False, time.perf_counter() - start)
+            return None
+        self.record(name, True, time.perf_counter() - start)
+        return result
+
+    def route(self, fetches: Dict[str, Callable[[], Optional[Dict]]], symbol: str = "") -> Optional[Dict]:
+        """Try sources healthiest first; the result is tagged with its source latency"""
+        for name in self.order(fetches.keys()):
+            start = time.perf_counter()
+            result = self.call(name, fetches[name])
+            if result:
+                self.log_served(result, symbol, name, time.perf_counter() - start)
+                return result
+        return None
+
+    def record(self, name: str, ok: bool, latency: float):
+        """Record an outcome for a source, starting the background prober if its circuit opened"""
+        with self._lock:
+            opened = self.sources[name].record(ok, latency)
+        if opened:
+            print(f"🔌 Circuit opened for {name} after {self.sources[name].consecutive_failures} failures")
+            self._start_prober()
+
+    def log_served(self, result: Dict, symbol: str, source: str, latency: float):
+        """Tag a result with the source latency and remember who served it"""
+        result["source_latency_ms"] = round(latency * 1000, 1)
+        self.served.append({
+            "symbol": symbol,
+            "source": source,
+            "latency_ms": result["source_latency_ms"],
+            "at": time.time(),
+        })
+
+    def stats(self) -> Dict:
+        order = self.order()
+        with self._lock:
+            return {
+                "order": order,
+                "sources": {name: health.stats() for name, health in self.sources.items()},
+                "recent": list(self.served)[-20:],
+            }
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is not None and self._prober.is_alive():
+                return
+            self._prober = threading.Thread(target=self._probe_loop, name="source-prober", daemon=True)
+            self._prober.start()
+
+    def _probe_loop(self):
+        """Re-test open sources that have a probe until their circuits have closed again"""
+        interval = self.probe_interval
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                open_sources = [
+                    name for name, health in self.sources.items()
+                    if health.state != SourceHealth.CLOSED and name in self.probes
+                ]
+            if not open_sources:
+                return
+
+            for name in open_sources:
+                self.call(name, self.probes[name])
+                if self.sources[name].state == SourceHealth.CLOSED:
+                    print(f"🔌 Circuit closed for {name} (probe succeeded)")
+            # A source that is still down is probed less and less often
+            interval = min(interval * 2, self.max_probe_interval)
@@ -0,0 +1,114 @@
+"""
+Persistent symbol metadata (company name, sector)
+Resident in memory, persisted to a JSON file, loaded lazily and refreshed
+rarely in a background thread - so no data source has to look it up on the
+hot path of a quote.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class SymbolMetadataStore:
+    """Company name and sector per symbol, shared by all data sources"""
+
+    # Metadata almost never changes - refresh entries older than a week
+    REFRESH_AFTER = 7 * 24 * 3600
+    # Don't retry a failed lookup for a symbol more often than this
+    RETRY_AFTER = 3600
+
+    def __init__(self, path: str, fetcher: Callable[[str], Optional[Dict]], defaults: Optional[Dict[str, Dict]] = None):
+        self.path = path
+        self.fetcher = fetcher
+        self.defaults = defaults or {}
+
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed_at = {}
+        self._queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def get(self, symbol: str) -> Dict:
+        """Name and sector for a symbol - never blocks on the network"""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(symbol)
+            stale = entry is None or time.time() - entry.get("updated_at", 0) > self.REFRESH_AFTER
+            if stale:
+                self._schedule(symbol)
+
+        if entry is not None:
+            return {"name": entry["name"], "sector": entry["sector"]}
+
+        default = self.defaults.get(symbol, {})
+        return {"name": default.get("name", symbol), "sector": default.get("sector", "N/A")}
+
+    def refresh(self, symbol: str) -> bool:
+        """Look a symbol up now and persist it; False if the lookup failed"""
+        try:
+            info = self.fetcher(symbol)
+        except Exception as e:
+            print(f"Metadata lookup failed for {symbol}: {e}")
+            info = None
+
+        with self._lock:
+            self._pending.discard(symbol)
+            if not info:
+                self._failed_at[symbol] = time.time()
+                return False
+
+            entries = self._load()
+            default = self.defaults.get(symbol, {})
+            entries[symbol] = {
+                "name": info.get("name") or default.get("name", symbol),
+                "sector": info.get("sector") or default.get("sector", "N/A"),
+                "updated_at": time.time(),
+            }
+            self._save(entries)
+        return True
+
+    def _schedule(self, symbol: str):
+        """Queue a background refresh (caller holds the lock)"""
+        if symbol in self._pending:
+            return
+        if time.time() - self._failed_at.get(symbol, 0) < self.RETRY_AFTER:
+            return
+
+        self._pending.add(symbol)
+        self._queue.put(symbol)
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name="symbol-metadata", daemon=True)
+            self._worker.start()
+
+    def _work(self):
+        while True:
+            try:
+                symbol = self._queue.get(timeout=30)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+            self.refresh(symbol)
+
+    def _load(self) -> Dict[str, Dict]:
+        """Read the file on first use (caller holds the lock)"""
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self, entries: Dict[str, Dict]):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,105 @@
+"""
+Per-symbol polling cadence for the scalping bot
+Each symbol has its own next-due time on a priority heap. Held positions
+and volatile symbols are polled every bar; quiet, flat symbols back off to
+every few bars, so data and LLM budget goes where the P&L risk is.
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Priorities (lower is polled first when a cycle is capped)
+PRIORITY_HELD = 0
+PRIORITY_VOLATILE = 1
+PRIORITY_NORMAL = 2
+PRIORITY_QUIET = 3
+
+
+class SymbolScheduler:
+    """Next-due times per symbol, with a cadence that adapts to position and volatility"""
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        bar_seconds: int,
+        max_per_cycle: Optional[int] = None,
+        max_multiple: int = 8,
+        hot_volatility_pct: float = 0.25,
+        quiet_volatility_pct: float = 0.05,
+        flat_return_pct: float = 0.2
+    ):
+        self.bar_seconds = bar_seconds
+        self.max_per_cycle = max_per_cycle
+        self.max_multiple = max_multiple
+        # Per-bar volatility (%) at or above which a symbol is polled every bar
+        self.hot_volatility_pct = hot_volatility_pct
+        # Below this volatility and this absolute return, a symbol counts as quiet and flat
+        self.quiet_volatility_pct = quiet_volatility_pct
+        self.flat_return_pct = flat_return_pct
+
+        self._lock = threading.Lock()
+        self._heap = []  # [(next_due, priority, seq, symbol)]
+        self._seq = itertools.count()
+        self._entries: Dict[str, Dict] = {}
+
+        for symbol in symbols:
+            self._schedule(symbol, 0.0, PRIORITY_NORMAL, 1, "initial")
+
+    def due(self, now: float) -> List[str]:
+        """Symbols to poll this cycle - most important first, at most max_per_cycle
+
+        Due symbols that don't fit the cap stay due and are picked up next cycle.
+        Every symbol returned must be handed back to update() once polled.
+        """
+        # Bar wake-ups land a little after the boundary - don't let that push a symbol a whole bar back
+        horizon = now + self.bar_seconds / 2
+        with self._lock:
+            ready = []
+            while self._heap and self._heap[0][0] <= horizon:
+                next_due, priority, seq, symbol = heapq.heappop(self._heap)
+                if self._entries.get(symbol, {}).get("seq") == seq:
+                    ready.append((priority, next_due, seq, symbol))
+            ready.sort()
+
+            limit = self.max_per_cycle or len(ready)
+            for priority, next_due, seq, symbol in ready[limit:]:
+                heapq.heappush(self._heap, (next_due, priority, seq, symbol))
+            return [symbol for _, _, _, symbol in ready[:limit]]
+
+    def update(self, symbol: str, now: float, held: bool, volatility_pct: Optional[float], return_pct: Optional[float]):
+        """Reschedule a symbol after polling it, from its position and recent behaviour"""
+        if held:
+            priority, multiple, reason = PRIORITY_HELD, 1, "open position"
+        elif volatility_pct is None:
+            priority, multiple, reason = PRIORITY_NORMAL, 1, "no volatility estimate"
+        elif volatility_pct >= self.hot_volatility_pct:
+            priority, multiple, reason = PRIORITY_VOLATILE, 1, "volatile"
+        elif volatility_pct <= self.quiet_volatility_pct and abs(return_pct or 0.0) < self.flat_return_pct:
+            priority, multiple, reason = PRIORITY_QUIET, self.max_multiple, "quiet and flat"
+        else:
+            # Back off in proportion to how far below the hot threshold it is
+            multiple = min(self.max_multiple, max(1, round(self.hot_volatility_pct / volatility_pct)))
+            priority, reason = PRIORITY_NORMAL, "normal"
+
+        with self._lock:
+            self._schedule(symbol, now + multiple * self.bar_seconds, priority, multiple, reason)
+
+    def stats(self, now: float) -> Dict:
+        with self._lock:
+            return {
+                symbol: {
+                    "cadence_seconds": entry["multiple"] * self.bar_seconds,
+                    "due_in_seconds": round(max(entry["next_due"] - now, 0.0), 1),
+                    "priority": entry["priority"],
+                    "reason": entry["reason"],
+                }
+                for symbol, entry in sorted(self._entries.items())
+            }
+
+    def _schedule(self, symbol: str, next_due: float, priority: int, multiple: int, reason: str):
+        """Push a fresh heap entry for symbol; older entries become stale (caller holds the lock)"""
+        seq = next(self._seq)
+        self._entries[symbol] = {"next_due": next_due, "priority": priority, "multiple": multiple, "reason": reason, "seq": seq}
+        heapq.heappush(self._heap, (next_due, priority, seq, symbol))
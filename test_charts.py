@@ -4,6 +4,7 @@ Test script to verify chart data retrieval works correctly
 """
 
 from trading_agent import TradingAgent
+from market_data_service import MarketDataService
 import json
 
 def test_market_data():
@@ -25,11 +26,11 @@ def test_market_data():
                 print(f"   Company: {data['company_name']}")
                 print(f"   Current Price: ${data['current_price']:.2f}")
                 print(f"   Change: {data['change_percent']:.2f}%")
-                print(f"   Historical data points: {len(data['historical_data']['Date'])}")
+                print(f"   Historical data points: {len(data['bars'])}")
 
-                # Verify data is JSON serializable
+                # Verify data is JSON serializable once converted at the API boundary
                 try:
-                    json.dumps(data)
+                    json.dumps(MarketDataService.to_json(data))
                     print(f"   ✅ Data is JSON serializable")
                 except Exception as e:
                     print(f"   ❌ JSON serialization failed: {e}")
@@ -0,0 +1,181 @@
+"""
+Append-only journal of an agent's trades and decisions
+Each trade or decision is one compact JSON line appended to journal.jsonl,
+fsynced in configurable batches. Every so many records the full state is
+written to snapshot.json and the journal is truncated, so startup replays a
+snapshot plus a short tail instead of the whole session.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.jsonl"
+
+
+class TradeJournal:
+    """Write-ahead journal with snapshot compaction for one agent's account"""
+
+    def __init__(self, directory: str, fsync_batch: int = 1, fsync_seconds: float = 1.0, snapshot_every: int = 1000):
+        self.directory = directory
+        # fsync after this many records, or at most fsync_seconds after the first record pending
+        # (a timer covers quiet periods; fsync_batch=0 leaves flushing to disk to the OS)
+        self.fsync_batch = fsync_batch
+        self.fsync_seconds = fsync_seconds
+        self.snapshot_every = snapshot_every
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0  # sequence number of the last record written
+        self._since_snapshot = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._timer = None  # pending timed fsync, if any
+
+        self.records = 0
+        self.fsyncs = 0
+        self.snapshots = 0
+
+    def replay(self) -> Optional[Dict]:
+        """Open the journal and rebuild the last recorded state; None if there is none yet
+
+        Call once, before appending. A torn final line from a crash is dropped.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        state = None
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path) as f:
+                snapshot = json.load(f)
+            self._seq = snapshot["seq"]
+            state = snapshot["state"]
+
+        journal_path = os.path.join(self.directory, JOURNAL_FILE)
+        good_bytes = 0
+        replayed = 0
+        if os.path.exists(journal_path):
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    good_bytes += len(line)
+                    if record["seq"] <= self._seq:
+                        continue  # already in the snapshot (crash between snapshot and truncate)
+                    state = self._apply(state, record)
+                    self._seq = record["seq"]
+                    replayed += 1
+
+        self._file = open(journal_path, "ab")
+        if self._file.tell() > good_bytes:
+            print(f"⚠️  Dropping torn journal tail ({self._file.tell() - good_bytes} bytes)")
+            self._file.truncate(good_bytes)
+        self._since_snapshot = replayed
+        return state
+
+    def append(self, record: Dict) -> bool:
+        """Append one record; returns True when a snapshot is due"""
+        with self._lock:
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, **record}, separators=(",", ":"), default=str)
+            self._file.write(line.encode() + b"\n")
+            self._file.flush()
+            self.records += 1
+            self._since_snapshot += 1
+            self._unsynced += 1
+
+            if self.fsync_batch and (
+                self._unsynced >= self.fsync_batch or time.monotonic() - self._last_sync >= self.fsync_seconds
+            ):
+                self._sync()
+            elif self.fsync_batch and self._timer is None:
+                delay = max(0.0, self._last_sync + self.fsync_seconds - time.monotonic())
+                self._timer = threading.Timer(delay, self._timed_sync)
+                self._timer.daemon = True
+                self._timer.start()
+            return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state: Dict):
+        """Write the full state atomically, then truncate the journal behind it"""
+        with self._lock:
+            self._sync()
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"seq": self._seq, "state": state}, f, separators=(",", ":"), default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+
+            self._file.truncate(0)
+            self._file.seek(0)
+            os.fsync(self._file.fileno())
+            self._since_snapshot = 0
+            self.snapshots += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "records": self.records,
+                "fsyncs": self.fsyncs,
+                "snapshots": self.snapshots,
+                "unsynced": self._unsynced,
+                "since_snapshot": self._since_snapshot,
+                "seq": self._seq,
+            }
+
+    def _timed_sync(self):
+        """fsync records that have waited fsync_seconds with no append to flush them"""
+        with self._lock:
+            self._timer = None
+            if self._file is not None:
+                self._sync()
+
+    def _sync(self):
+        """fsync pending records (caller holds the lock)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @staticmethod
+    def _apply(state: Optional[Dict], record: Dict) -> Optional[Dict]:
+        """Roll state forward by one record - trades carry the resulting balance and position"""
+        if state is None:
+            return state
+        if record["type"] == "reasoning":
+            # Reasoning that streamed in after its trade was recorded
+            for trade in reversed(state["trade_history"]):
+                if trade["timestamp"] == record["timestamp"] and trade["symbol"] == record["symbol"]:
+                    trade["reasoning"] = record["reasoning"]
+                    break
+            return state
+        if record["type"] != "trade":
+            return state  # decisions are an audit trail, they don't change the account
+
+        trade = record["trade"]
+        state["balance"] = trade["balance_after"]
+        if record["position"]:
+            state["portfolio"][trade["symbol"]] = record["position"]
+        else:
+            state["portfolio"].pop(trade["symbol"], None)
+        state["trade_history"].append(trade)
+        state["trade_count"] = state.get("trade_count", len(state["trade_history"]) - 1) + 1
+        return state
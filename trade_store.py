@@ -0,0 +1,172 @@
+"""
+SQLite-backed trade and decision history
+Every trade and decision is a row keyed by agent, indexed for newest-first
+pages (by id), per-symbol pages and time ranges, so history queries read
+only the rows they return and the agent can keep just a short tail in memory.
+Aggregates (trades per symbol, realized P&L) are computed in SQL.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    total REAL NOT NULL,
+    balance_after REAL NOT NULL,
+    realized_pnl REAL,
+    reasoning TEXT
+);
+CREATE INDEX IF NOT EXISTS trades_agent ON trades (agent_id, id);
+CREATE INDEX IF NOT EXISTS trades_agent_symbol ON trades (agent_id, symbol, id);
+CREATE INDEX IF NOT EXISTS trades_agent_time ON trades (agent_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    action TEXT NOT NULL,
+    confidence REAL,
+    price REAL
+);
+CREATE INDEX IF NOT EXISTS decisions_agent ON decisions (agent_id, id);
+CREATE INDEX IF NOT EXISTS decisions_agent_symbol ON decisions (agent_id, symbol, id);
+CREATE INDEX IF NOT EXISTS decisions_agent_time ON decisions (agent_id, timestamp);
+"""
+
+TRADE_COLUMNS = ("timestamp", "symbol", "action", "quantity", "price", "total", "balance_after", "realized_pnl", "reasoning")
+DECISION_COLUMNS = ("timestamp", "symbol", "action", "confidence", "price")
+MAX_PAGE = 500
+
+
+class TradeStore:
+    """Trade and decision rows for any number of agents in one SQLite file"""
+
+    def __init__(self, path: str = "trade_history.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by the agents' execution threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record_trade(self, agent_id: str, trade: Dict):
+        self.record_trades(agent_id, [trade])
+
+    def record_trades(self, agent_id: str, trades: Iterable[Dict]):
+        rows = [(agent_id, *(trade.get(column) for column in TRADE_COLUMNS)) for trade in trades]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO trades (agent_id, {', '.join(TRADE_COLUMNS)}) VALUES ({', '.join('?' * (len(TRADE_COLUMNS) + 1))})",
+                rows
+            )
+
+    def update_reasoning(self, agent_id: str, timestamp: str, symbol: str, reasoning: str):
+        """Set the reasoning of a trade recorded before it was known"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE trades SET reasoning = ? WHERE agent_id = ? AND timestamp = ? AND symbol = ?",
+                (reasoning, agent_id, timestamp, symbol)
+            )
+
+    def record_decision(self, agent_id: str, decision: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO decisions (agent_id, {', '.join(DECISION_COLUMNS)}) VALUES ({', '.join('?' * (len(DECISION_COLUMNS) + 1))})",
+                (agent_id, *(decision.get(column) for column in DECISION_COLUMNS))
+            )
+
+    def trades(self, agent_id: str, limit: int = 50, cursor: Optional[int] = None, symbol: Optional[str] = None,
+               start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """Newest-first page of trades; pass the returned next_cursor to get the page after it"""
+        return self._page("trades", TRADE_COLUMNS, agent_id, limit, cursor, symbol, start, end)
+
+    def decisions(self, agent_id: str, limit: int = 50, cursor: Optional[int] = None, symbol: Optional[str] = None,
+                  start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """Newest-first page of decisions, like trades()"""
+        return self._page("decisions", DECISION_COLUMNS, agent_id, limit, cursor, symbol, start, end)
+
+    def count_trades(self, agent_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM trades WHERE agent_id = ?", (agent_id,)).fetchone()[0]
+
+    def summary(self, agent_id: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """Trades, volume and realized P&L per symbol and in total"""
+        where, params = self._filters(agent_id, None, start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT symbol,
+                           COUNT(*) AS trades,
+                           SUM(action = 'BUY') AS buys,
+                           SUM(action = 'SELL') AS sells,
+                           SUM(total) AS volume,
+                           COALESCE(SUM(realized_pnl), 0) AS realized_pnl
+                    FROM trades WHERE {where}
+                    GROUP BY symbol ORDER BY trades DESC, symbol""",
+                params
+            ).fetchall()
+
+        by_symbol = [dict(row) for row in rows]
+        return {
+            "total_trades": sum(row["trades"] for row in by_symbol),
+            "buys": sum(row["buys"] for row in by_symbol),
+            "sells": sum(row["sells"] for row in by_symbol),
+            "realized_pnl": sum(row["realized_pnl"] for row in by_symbol),
+            "by_symbol": by_symbol,
+        }
+
+    def delete_agent(self, agent_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM trades WHERE agent_id = ?", (agent_id,))
+            self._conn.execute("DELETE FROM decisions WHERE agent_id = ?", (agent_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _page(self, table: str, columns, agent_id: str, limit: int, cursor: Optional[int],
+              symbol: Optional[str], start: Optional[str], end: Optional[str]) -> Dict:
+        limit = max(1, min(limit, MAX_PAGE))
+        where, params = self._filters(agent_id, symbol, start, end)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params).fetchone()[0]
+            if cursor is not None:
+                where += " AND id < ?"
+                params.append(cursor)
+            # One row past the page tells us whether there is a next page
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(columns)} FROM {table} WHERE {where} ORDER BY id DESC LIMIT ?",
+                [*params, limit + 1]
+            ).fetchall()
+
+        items = [dict(row) for row in rows[:limit]]
+        return {
+            table: items,
+            "next_cursor": items[-1]["id"] if len(rows) > limit else None,
+            f"total_{table}": total,
+        }
+
+    @staticmethod
+    def _filters(agent_id: str, symbol: Optional[str], start: Optional[str], end: Optional[str]):
+        """WHERE clause for the filters given - timestamps are ISO strings, so they compare in order"""
+        clauses, params = ["agent_id = ?"], [agent_id]
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol.upper())
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        return " AND ".join(clauses), params
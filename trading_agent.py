@@ -1,107 +1,433 @@
+import asyncio
 import json
 import os
+import time
+from concurrent.futures import Future
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from mistralai import Mistral
+from typing import Dict, Iterator, List, Optional
 from market_data_service import MarketDataService
+from rate_limiter import PRIORITY_HELD, PRIORITY_SCALPING
+from decision_cache import DecisionCache
+from decision_stream import DecisionStreamParser
+from execution_actor import ExecutionActor
+from llm_client import LLMClient, LLMCompletion, MistralLLMClient, TokenMeter, fake_client_from_env
+from prompt_builder import PromptBuilder, estimate_tokens
+from retry_policy import RetryExhausted, RetryPolicy
+from trade_journal import TradeJournal
+from trade_store import TradeStore
+
+
+class IncompleteBatch(ValueError):
+    """A batch response left some symbols without a valid decision"""
 
 
 class TradingAgent:
     """AI-powered trading agent using Mistral AI"""
 
-    def __init__(self, name: str, initial_balance: float, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        name: str,
+        initial_balance: float,
+        api_key: Optional[str] = None,
+        decision_ttl: float = 300.0,
+        llm_deadline: float = 20.0,
+        llm_max_attempts: int = 3,
+        llm_client: Optional[LLMClient] = None,
+        history_limit: int = 500
+    ):
         self.name = name
         self.initial_balance = initial_balance
         self.balance = initial_balance
         self.portfolio = {}  # {symbol: {"quantity": int, "avg_price": float}}
-        self.trade_history = []
+        self.trade_history = []  # only the latest history_limit trades once a trade store is attached
+        self.trade_count = 0
         self.performance_history = []
 
-        # Initialize Mistral client
+        # Reuse LLM decisions while price, volume and position haven't materially moved
+        self.decision_cache = DecisionCache(ttl=decision_ttl)
+        # Bounded retries so one slow or failing LLM call can't stall a trading cycle
+        self.retry_policy = RetryPolicy(max_attempts=llm_max_attempts, deadline=llm_deadline)
+        self.prompt_builder = PromptBuilder()
+        self.token_meter = TokenMeter()
+        # Trades and state changes are applied one at a time, in order, off the callers' threads
+        self.execution = ExecutionActor(name=f"orders-{name}")
+        # Optional write-ahead journal of trades and decisions (see attach_journal)
+        self.journal: Optional[TradeJournal] = None
+        # Optional SQLite history of trades and decisions (see attach_trade_store)
+        self.trade_store: Optional[TradeStore] = None
+        self.store_id: Optional[str] = None
+        self.history_limit = history_limit
+
+        # Initialize LLM client (Mistral unless one is injected or LLM_PROVIDER=fake)
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY", "")
-        if self.api_key:
-            self.client = Mistral(api_key=self.api_key)
+        if llm_client is not None:
+            self.client = llm_client
+        elif os.getenv("LLM_PROVIDER", "").lower() == "fake":
+            self.client = fake_client_from_env(os.environ)
+            print("🧪 Using the in-process fake LLM (LLM_PROVIDER=fake)")
+        elif self.api_key:
+            self.client = MistralLLMClient(api_key=self.api_key)
         else:
             self.client = None
             print("⚠️ Warning: No Mistral API key provided. Agent will use fallback logic.")
 
-    def get_market_data(self, symbol: str, period: str = "1mo") -> Dict:
-        """Fetch market data using MarketDataService"""
-        return MarketDataService.get_market_data(symbol, period)
+    def get_market_data(self, symbol: str, period: str = "1mo", priority: Optional[int] = None, interval: str = "1d") -> Dict:
+        """Fetch market data using MarketDataService (held symbols get first call on the API budget)"""
+        if priority is None:
+            priority = PRIORITY_HELD if symbol in self.portfolio else PRIORITY_SCALPING
+        return MarketDataService.get_market_data(symbol, period, interval, priority=priority)
 
     def analyze_with_ai(self, market_data: Dict) -> Dict:
         """Use Mistral AI to analyze market data and make trading decision"""
         if not self.client:
-            # Fallback: More aggressive momentum strategy
-            change = market_data["change_percent"]
-            if change > 0.5:
-                return {"action": "BUY", "confidence": 0.7, "reasoning": "Positive momentum (fallback strategy)", "suggested_quantity": 5}
-            elif change < -0.5:
-                return {"action": "SELL", "confidence": 0.6, "reasoning": "Negative momentum (fallback strategy)", "suggested_quantity": None}
-            else:
-                return {"action": "HOLD", "confidence": 0.5, "reasoning": "Neutral market (fallback strategy)", "suggested_quantity": None}
-
-        # Prepare prompt for Mistral
-        prompt = f"""You are an expert trading analyst. Analyze the following market data and provide a trading recommendation.
-
-Market Data:
-- Symbol: {market_data['symbol']}
-- Company: {market_data['company_name']}
-- Current Price: ${market_data['current_price']:.2f}
-- Previous Close: ${market_data['previous_close']:.2f}
-- Change: {market_data['change_percent']:.2f}%
-- Volume: {market_data['volume']:,}
-- 52-Week High: ${market_data['high_52w']:.2f}
-- 52-Week Low: ${market_data['low_52w']:.2f}
-- Sector: {market_data['sector']}
-
-Current Portfolio Status:
-- Available Balance: ${self.balance:.2f}
-- Holdings: {self.portfolio.get(market_data['symbol'], {}).get('quantity', 0)} shares
-
-Based on this data, should I BUY, SELL, or HOLD?
-Provide your response in the following JSON format:
-{{
-    "action": "BUY/SELL/HOLD",
-    "confidence": 0.0-1.0,
-    "reasoning": "brief explanation",
-    "suggested_quantity": number of shares (if BUY/SELL)
-}}"""
+            return self._fallback_decision(market_data)
+
+        symbol = market_data['symbol']
+        holdings = self.portfolio.get(symbol, {}).get('quantity', 0)
+        fingerprint = self.decision_cache.fingerprint(market_data, holdings, self.balance, self.initial_balance)
+        cached = self.decision_cache.get(symbol, fingerprint)
+        if cached is not None:
+            print(f"♻️  Inputs unchanged for {symbol}, reusing cached AI decision")
+            return {**cached, "cached": True}
 
+        prompt = self._decision_prompt(market_data)
+
+        def attempt(timeout: float) -> Dict:
+            return self._parse_ai_response(self._complete(prompt, timeout).content)
+
+        self.decision_cache.record_call()
         try:
-            response = self.client.chat.complete(
-                model="mistral-small-latest",
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            # Parse AI response
-            ai_response = response.choices[0].message.content
-
-            # Store the raw AI response for logging
-            print(f"\n🤖 AI RAW RESPONSE:\n{ai_response}\n")
-
-            # Try to extract JSON from response
-            if "{" in ai_response and "}" in ai_response:
-                json_start = ai_response.index("{")
-                json_end = ai_response.rindex("}") + 1
-                decision = json.loads(ai_response[json_start:json_end])
-            else:
-                # Parse text response
-                decision = self._parse_text_response(ai_response)
+            decision = self.retry_policy.run(attempt)
+        except RetryExhausted as e:
+            print(f"Error with AI analysis: {e}")
+            return self._fallback_decision(market_data, f"AI unavailable, {'deadline exceeded' if e.deadline_exceeded else 'retries exhausted'}")
 
-            # Store full AI response in decision
-            decision["ai_full_response"] = ai_response
+        self._cache_decision(symbol, fingerprint, decision)
+        return decision
 
-            return decision
+    async def analyze_with_ai_async(self, market_data: Dict) -> Dict:
+        """Event-loop version of analyze_with_ai"""
+        if not self.client:
+            return self._fallback_decision(market_data)
 
-        except Exception as e:
+        symbol = market_data['symbol']
+        holdings = self.portfolio.get(symbol, {}).get('quantity', 0)
+        fingerprint = self.decision_cache.fingerprint(market_data, holdings, self.balance, self.initial_balance)
+        cached = self.decision_cache.get(symbol, fingerprint)
+        if cached is not None:
+            print(f"♻️  Inputs unchanged for {symbol}, reusing cached AI decision")
+            return {**cached, "cached": True}
+
+        prompt = self._decision_prompt(market_data)
+
+        async def attempt(timeout: float) -> Dict:
+            completion = await self.client.complete_async(prompt, timeout=timeout)
+            self._count_tokens(prompt, completion)
+            return self._parse_ai_response(completion.content)
+
+        self.decision_cache.record_call()
+        try:
+            decision = await self.retry_policy.run_async(attempt)
+        except RetryExhausted as e:
             print(f"Error with AI analysis: {e}")
-            # Fallback to simple strategy
-            return self.analyze_with_ai(market_data) if self.client else {
-                "action": "HOLD",
-                "confidence": 0.5,
-                "reasoning": f"Error in AI analysis: {str(e)}"
-            }
+            return self._fallback_decision(market_data, f"AI unavailable, {'deadline exceeded' if e.deadline_exceeded else 'retries exhausted'}")
+
+        self._cache_decision(symbol, fingerprint, decision)
+        return decision
+
+    def _parse_ai_response(self, ai_response: str) -> Dict:
+        """Decision from a completion - the JSON object in it, else keywords in the text
+
+        Raises ValueError for a reply without a usable decision, so the retry policy asks again.
+        """
+        # Store the raw AI response for logging
+        print(f"\n🤖 AI RAW RESPONSE:\n{ai_response}\n")
+
+        # Try to extract JSON from response
+        if "{" in ai_response and "}" in ai_response:
+            json_start = ai_response.index("{")
+            json_end = ai_response.rindex("}") + 1
+            decision = self._validate_decision(json.loads(ai_response[json_start:json_end]))
+            if decision is None:
+                raise ValueError("AI response has no valid action and confidence")
+        else:
+            # Parse text response
+            decision = self._parse_text_response(ai_response)
+
+        # Store full AI response in decision
+        decision["ai_full_response"] = ai_response
+        return decision
+
+    def _cache_decision(self, symbol: str, fingerprint, decision: Dict):
+        """Reuse a decision for matching inputs - only one that would pass validation"""
+        if self._validate_decision(decision) is None:
+            print(f"⚠️ Not caching malformed AI decision for {symbol}")
+            return
+        self.decision_cache.put(symbol, fingerprint, decision)
+
+    def _decision_prompt(self, market_data: Dict) -> str:
+        """Compact single-symbol prompt built from the bar features"""
+        holding = self.portfolio.get(market_data['symbol'], {})
+        return self.prompt_builder.decision_prompt(
+            market_data, holding.get('quantity', 0), holding.get('avg_price', 0.0), self.balance
+        )
+
+    def analyze_streaming(self, market_data: Dict) -> Iterator[Dict]:
+        """Streaming analyze_with_ai - yields events as the completion arrives
+
+        Events are {"type": "token", "text"}, then {"type": "decision", "decision", "early"}
+        as soon as action, confidence and suggested_quantity are known, and finally
+        {"type": "complete", "decision"} once the reasoning has streamed in.
+        """
+        if not self.client:
+            yield from self._settled_events(self._fallback_decision(market_data))
+            return
+
+        symbol = market_data['symbol']
+        holdings = self.portfolio.get(symbol, {}).get('quantity', 0)
+        fingerprint = self.decision_cache.fingerprint(market_data, holdings, self.balance, self.initial_balance)
+        cached = self.decision_cache.get(symbol, fingerprint)
+        if cached is not None:
+            print(f"♻️  Inputs unchanged for {symbol}, reusing cached AI decision")
+            yield from self._settled_events({**cached, "cached": True})
+            return
+
+        prompt = self._decision_prompt(market_data)
+        deadline = time.monotonic() + self.retry_policy.deadline
+
+        def open_stream(timeout: float) -> Iterator[str]:
+            return self.client.stream(prompt, timeout=timeout)
+
+        self.decision_cache.record_call()
+        try:
+            stream = self.retry_policy.run(open_stream)
+        except RetryExhausted as e:
+            print(f"Error with AI analysis: {e}")
+            reason = f"AI unavailable, {'deadline exceeded' if e.deadline_exceeded else 'retries exhausted'}"
+            yield from self._settled_events(self._fallback_decision(market_data, reason))
+            return
+
+        parser = DecisionStreamParser()
+        early = None
+        early_checked = False
+        try:
+            for text in stream:
+                yield {"type": "token", "text": text}
+                if parser.feed(text) and not early_checked:
+                    # Same checks as the final decision - out-of-range values wait for the full reply
+                    early_checked = True
+                    early = self._validate_decision(parser.early_decision())
+                    if early is not None:
+                        early.pop("ai_full_response")
+                        yield {"type": "decision", "decision": early, "early": True}
+                if time.monotonic() > deadline:
+                    print(f"⏱️  AI stream for {symbol} passed its deadline, keeping what arrived")
+                    break
+        except Exception as e:
+            print(f"Error while streaming AI analysis: {e}")
+
+        print(f"\n🤖 AI RAW RESPONSE:\n{parser.text}\n")
+        # Streams don't report usage - estimate it
+        self._record_tokens(estimate_tokens(prompt), estimate_tokens(parser.text))
+        decision = self._validate_decision(parser.final_decision())
+        if decision is None and early is not None:
+            decision = {**early, "reasoning": parser.text[:200]}
+        elif decision is None and parser.text:
+            decision = self._parse_text_response(parser.text)
+
+        if decision is None:
+            decision = self._fallback_decision(market_data, "AI stream failed")
+        else:
+            decision["ai_full_response"] = parser.text
+            self._cache_decision(symbol, fingerprint, decision)
+
+        if early is None:
+            yield {"type": "decision", "decision": decision, "early": False}
+        yield {"type": "complete", "decision": decision}
+
+    def make_decision_streaming(
+        self,
+        symbol: str,
+        market_data: Optional[Dict] = None,
+        period: str = "1mo",
+        interval: str = "1d"
+    ) -> Iterator[Dict]:
+        """make_decision that trades as soon as the actionable fields have streamed in
+
+        Yields the analyze_streaming events plus {"type": "trade", "trades"} right after
+        acting; the trade's reasoning is filled in once the full completion has arrived.
+        """
+        print(f"\n🔍 Analyzing {symbol} (streaming)...")
+        if market_data is None:
+            market_data = self.get_market_data(symbol, period, interval=interval)
+        if not market_data:
+            print(f"❌ Could not fetch market data for {symbol}")
+            yield {"type": "error", "detail": f"Could not fetch market data for {symbol}"}
+            return
+
+        trades = []
+        for event in self.analyze_streaming(market_data):
+            yield event
+
+            if event["type"] == "decision":
+                trades = self.execution.call(self._act, {"symbol": symbol, "market_data": market_data, "decision": event["decision"]})
+                yield {"type": "trade", "trades": trades}
+
+            elif event["type"] == "complete" and trades:
+                # The trade went out before the reasoning finished streaming
+                self.execution.call(self._fill_reasoning, trades, event["decision"].get("reasoning", ""))
+
+    def _complete(self, prompt: str, timeout: float) -> LLMCompletion:
+        """One completion, with its token usage logged and counted"""
+        completion = self.client.complete(prompt, timeout=timeout)
+        self._count_tokens(prompt, completion)
+        return completion
+
+    def _count_tokens(self, prompt: str, completion: LLMCompletion):
+        self._record_tokens(
+            completion.prompt_tokens or estimate_tokens(prompt),
+            completion.completion_tokens or estimate_tokens(completion.content or "")
+        )
+
+    def _record_tokens(self, prompt_tokens: int, completion_tokens: int):
+        self.token_meter.record(prompt_tokens, completion_tokens)
+        print(f"🧮 Tokens: {prompt_tokens} prompt + {completion_tokens} completion")
+
+    @staticmethod
+    def _settled_events(decision: Dict) -> Iterator[Dict]:
+        """Events for a decision that's known up front (fallback or cache hit)"""
+        yield {"type": "decision", "decision": decision, "early": False}
+        yield {"type": "complete", "decision": decision}
+
+    def analyze_batch_with_ai(self, market_data_list: List[Dict]) -> Dict[str, Dict]:
+        """Decide for several symbols with one Mistral call; returns {symbol: decision}
+
+        The model answers with a JSON array. Each entry is validated on its own and only
+        the symbols whose entries are missing or malformed are sent again.
+        """
+        if not self.client:
+            return {md['symbol']: self._fallback_decision(md) for md in market_data_list}
+
+        decisions = {}
+        pending = {}  # {symbol: (market_data, fingerprint)}
+        for market_data in market_data_list:
+            symbol = market_data['symbol']
+            holdings = self.portfolio.get(symbol, {}).get('quantity', 0)
+            fingerprint = self.decision_cache.fingerprint(market_data, holdings, self.balance, self.initial_balance)
+            cached = self.decision_cache.get(symbol, fingerprint)
+            if cached is not None:
+                decisions[symbol] = {**cached, "cached": True}
+            else:
+                pending[symbol] = (market_data, fingerprint)
+
+        # One retry budget and deadline for the whole batch: an attempt that leaves
+        # symbols without a valid entry fails, and the next asks only for those
+        def attempt(timeout: float) -> None:
+            self.decision_cache.record_call()
+            ai_response = self._complete(self._batch_prompt([market_data for market_data, _ in pending.values()]), timeout).content
+            print(f"\n🤖 AI RAW BATCH RESPONSE ({len(pending)} symbols):\n{ai_response}\n")
+            for symbol, decision in self._parse_batch_response(ai_response, list(pending)).items():
+                market_data, fingerprint = pending.pop(symbol)
+                self._cache_decision(symbol, fingerprint, decision)
+                decisions[symbol] = decision
+            if pending:
+                raise IncompleteBatch(f"No valid decision for {', '.join(pending)} in batch response")
+
+        reason = "AI batch entry invalid"
+        if pending:
+            try:
+                self.retry_policy.run(attempt)
+            except RetryExhausted as e:
+                print(f"Error with batched AI analysis: {e}")
+                if not isinstance(e.last_error, IncompleteBatch):
+                    reason = f"AI unavailable, {'deadline exceeded' if e.deadline_exceeded else 'retries exhausted'}"
+
+        for symbol, (market_data, _) in pending.items():
+            decisions[symbol] = self._fallback_decision(market_data, reason)
+        return decisions
+
+    def _batch_prompt(self, market_data_list: List[Dict]) -> str:
+        """One compact prompt covering several symbols, asking for a JSON array of decisions"""
+        holdings = {
+            symbol: (holding["quantity"], holding["avg_price"])
+            for symbol, holding in self.portfolio.items()
+        }
+        return self.prompt_builder.batch_prompt(market_data_list, holdings, self.balance)
+
+    def _parse_batch_response(self, text: str, symbols: List[str]) -> Dict[str, Dict]:
+        """Valid decisions by symbol from a batch response; malformed entries are left out"""
+        entries = []
+        if "[" in text and "]" in text:
+            try:
+                parsed = json.loads(text[text.index("["):text.rindex("]") + 1])
+                if isinstance(parsed, list):
+                    entries = parsed
+            except ValueError:
+                pass
+
+        if not entries:
+            # Broken array - salvage whichever objects do parse
+            decoder = json.JSONDecoder()
+            position = text.find("{")
+            while position != -1:
+                try:
+                    entry, end = decoder.raw_decode(text, position)
+                    entries.append(entry)
+                    position = text.find("{", end)
+                except ValueError:
+                    position = text.find("{", position + 1)
+
+        wanted = set(symbols)
+        decisions = {}
+        for entry in entries:
+            decision = self._validate_decision(entry)
+            if decision is None:
+                continue
+            symbol = str(entry.get("symbol", "")).upper()
+            if symbol in wanted and symbol not in decisions:
+                decisions[symbol] = decision
+        return decisions
+
+    @staticmethod
+    def _validate_decision(entry) -> Optional[Dict]:
+        """A normalized decision, or None if an entry doesn't have the required fields"""
+        if not isinstance(entry, dict):
+            return None
+
+        action = str(entry.get("action", "")).upper()
+        if action not in ("BUY", "SELL", "HOLD"):
+            return None
+
+        try:
+            confidence = float(entry.get("confidence"))
+        except (TypeError, ValueError):
+            return None
+        if not 0.0 <= confidence <= 1.0:
+            return None
+
+        quantity = entry.get("suggested_quantity")
+        try:
+            quantity = int(quantity) if quantity is not None else None
+        except (TypeError, ValueError):
+            quantity = None
+
+        return {
+            "action": action,
+            "confidence": confidence,
+            "reasoning": str(entry.get("reasoning", "")),
+            "suggested_quantity": quantity,
+            "ai_full_response": json.dumps(entry)
+        }
+
+    def _fallback_decision(self, market_data: Dict, reason: str = "fallback strategy") -> Dict:
+        """More aggressive momentum strategy used when the AI isn't available"""
+        change = market_data["change_percent"]
+        if change > 0.5:
+            return {"action": "BUY", "confidence": 0.7, "reasoning": f"Positive momentum ({reason})", "suggested_quantity": 5}
+        elif change < -0.5:
+            return {"action": "SELL", "confidence": 0.6, "reasoning": f"Negative momentum ({reason})", "suggested_quantity": None}
+        else:
+            return {"action": "HOLD", "confidence": 0.5, "reasoning": f"Neutral market ({reason})", "suggested_quantity": None}
 
     def _parse_text_response(self, text: str) -> Dict:
         """Parse text response if JSON parsing fails"""
@@ -122,13 +448,21 @@ Provide your response in the following JSON format:
 
     def execute_trade(self, symbol: str, action: str, quantity: int, price: float, reasoning: str = "") -> bool:
         """Execute a trade (BUY/SELL)"""
+        return self.execution.call(self._apply_trade, symbol, action, quantity, price, reasoning) is not None
+
+    def submit_trade(self, symbol: str, action: str, quantity: int, price: float, reasoning: str = "") -> "Future[bool]":
+        """Queue a trade without waiting for it - the Future resolves to whether it executed"""
+        return self.execution.submit(lambda: self._apply_trade(symbol, action, quantity, price, reasoning) is not None)
+
+    def _apply_trade(self, symbol: str, action: str, quantity: int, price: float, reasoning: str = "") -> Optional[Dict]:
+        """Apply a trade to the account and return its record, or None if rejected (execution actor only)"""
         timestamp = datetime.now().isoformat()
 
         if action == "BUY":
             total_cost = quantity * price
             if total_cost > self.balance:
                 print(f"❌ Insufficient funds. Need ${total_cost:.2f}, have ${self.balance:.2f}")
-                return False
+                return None
 
             self.balance -= total_cost
 
@@ -154,16 +488,17 @@ Provide your response in the following JSON format:
                 "balance_after": self.balance,
                 "reasoning": reasoning
             }
-            self.trade_history.append(trade)
+            self._record_trade(trade, self.portfolio[symbol])
             print(f"✅ Bought {quantity} shares of {symbol} at ${price:.2f}")
-            return True
+            return trade
 
         elif action == "SELL":
             if symbol not in self.portfolio or self.portfolio[symbol]["quantity"] < quantity:
                 print(f"❌ Insufficient shares. Have {self.portfolio.get(symbol, {}).get('quantity', 0)} shares")
-                return False
+                return None
 
             total_revenue = quantity * price
+            realized_pnl = (price - self.portfolio[symbol]["avg_price"]) * quantity
             self.balance += total_revenue
 
             self.portfolio[symbol]["quantity"] -= quantity
@@ -180,30 +515,144 @@ Provide your response in the following JSON format:
                 "price": price,
                 "total": total_revenue,
                 "balance_after": self.balance,
+                "realized_pnl": realized_pnl,
                 "reasoning": reasoning
             }
-            self.trade_history.append(trade)
+            self._record_trade(trade, self.portfolio.get(symbol))
             print(f"✅ Sold {quantity} shares of {symbol} at ${price:.2f}")
-            return True
+            return trade
 
-        return False
+        return None
 
-    def make_decision(self, symbol: str) -> Optional[Dict]:
+    def make_decision(
+        self,
+        symbol: str,
+        market_data: Optional[Dict] = None,
+        period: str = "1mo",
+        interval: str = "1d"
+    ) -> Optional[Dict]:
         """Analyze market and make trading decision"""
+        analysis = self.analyze(symbol, market_data, period, interval)
+        if not analysis:
+            return None
+        return self.act(analysis)
+
+    async def make_decision_async(
+        self,
+        symbol: str,
+        market_data: Optional[Dict] = None,
+        period: str = "1mo",
+        interval: str = "1d",
+        market_data_service=None
+    ) -> Optional[Dict]:
+        """Event-loop version of make_decision
+
+        market_data_service is an AsyncMarketDataService to fetch with; without one the
+        blocking fetch runs on a worker thread.
+        """
+        print(f"\n🔍 Analyzing {symbol}...")
+
+        if market_data is None:
+            priority = PRIORITY_HELD if symbol in self.portfolio else PRIORITY_SCALPING
+            if market_data_service is not None:
+                market_data = await market_data_service.get_market_data(symbol, period, interval, priority)
+            else:
+                market_data = await asyncio.to_thread(self.get_market_data, symbol, period, priority, interval)
+        if not market_data:
+            print(f"❌ Could not fetch market data for {symbol}")
+            return None
+
+        decision = await self.analyze_with_ai_async(market_data)
+        return await self.act_async({"symbol": symbol, "market_data": market_data, "decision": decision})
+
+    def analyze(
+        self,
+        symbol: str,
+        market_data: Optional[Dict] = None,
+        period: str = "1mo",
+        interval: str = "1d"
+    ) -> Optional[Dict]:
+        """Fetch and analyze a symbol without trading - safe to run for several symbols at once
+
+        Pass market_data to analyze bars the caller already has instead of fetching
+        period/interval again. Returns {"symbol", "market_data", "decision", "timings"}
+        or None if there's no data.
+        """
         print(f"\n🔍 Analyzing {symbol}...")
 
-        # Get market data
-        market_data = self.get_market_data(symbol)
+        # Get market data (unless the caller already fetched it)
+        start = time.perf_counter()
+        if market_data is None:
+            market_data = self.get_market_data(symbol, period, interval=interval)
+        fetch_seconds = time.perf_counter() - start
         if not market_data:
             print(f"❌ Could not fetch market data for {symbol}")
             return None
 
         # Get AI recommendation
+        start = time.perf_counter()
         decision = self.analyze_with_ai(market_data)
+        analyze_seconds = time.perf_counter() - start
+
+        return {
+            "symbol": symbol,
+            "market_data": market_data,
+            "decision": decision,
+            "timings": {
+                "fetch_ms": round(fetch_seconds * 1000, 1),
+                "analyze_ms": round(analyze_seconds * 1000, 1),
+            }
+        }
+
+    def analyze_batch(self, market_data: Dict[str, Dict]) -> Dict[str, Dict]:
+        """analyze() for several symbols whose bars the caller already has, with one LLM call
 
-        print(f"🤖 AI Decision: {decision['action']} (Confidence: {decision['confidence']:.0%})")
+        Returns {symbol: analysis} in the same shape as analyze().
+        """
+        print(f"\n🔍 Analyzing {', '.join(market_data)} in one batch...")
+
+        start = time.perf_counter()
+        decisions = self.analyze_batch_with_ai(list(market_data.values()))
+        analyze_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        return {
+            symbol: {
+                "symbol": symbol,
+                "market_data": data,
+                "decision": decisions[symbol],
+                "timings": {"fetch_ms": 0.0, "analyze_ms": analyze_ms}
+            }
+            for symbol, data in market_data.items()
+        }
+
+    def act(self, analysis: Dict) -> Dict:
+        """Trade on an analysis from analyze() - safe to call concurrently, trades are applied in order"""
+        self.execution.call(self._act, analysis)
+        return analysis["decision"]
+
+    async def act_async(self, analysis: Dict) -> Dict:
+        """Event-loop version of act - awaits the execution actor instead of blocking"""
+        await asyncio.wrap_future(self.execution.submit(self._act, analysis))
+        return analysis["decision"]
+
+    def _act(self, analysis: Dict) -> List[Dict]:
+        """Size and apply the trade for an analysis; returns the trades made (execution actor only)"""
+        symbol = analysis["symbol"]
+        market_data = analysis["market_data"]
+        decision = analysis["decision"]
+
+        print(f"🤖 AI Decision for {symbol}: {decision['action']} (Confidence: {decision['confidence']:.0%})")
         print(f"💭 Reasoning: {decision['reasoning']}")
 
+        self._record_decision({
+            "timestamp": datetime.now().isoformat(),
+            "symbol": symbol,
+            "action": decision["action"],
+            "confidence": decision["confidence"],
+            "price": market_data["current_price"]
+        })
+
+        trades = []
         # Execute trade if confidence is high enough (lowered threshold to be more active)
         if decision['confidence'] >= 0.5:
             if decision['action'] == "BUY":
@@ -213,103 +662,232 @@ Provide your response in the following JSON format:
                 quantity = min(max_affordable, suggested_qty) if suggested_qty else max(1, max_affordable // 10)
 
                 if quantity > 0:
-                    self.execute_trade(
+                    trades.append(self._apply_trade(
                         symbol,
                         "BUY",
                         quantity,
                         market_data['current_price'],
                         decision['reasoning']
-                    )
+                    ))
 
             elif decision['action'] == "SELL":
                 if symbol in self.portfolio:
                     quantity = self.portfolio[symbol]["quantity"]
-                    self.execute_trade(
+                    trades.append(self._apply_trade(
                         symbol,
                         "SELL",
                         quantity,
                         market_data['current_price'],
                         decision['reasoning']
-                    )
+                    ))
+
+        return [trade for trade in trades if trade]
+
+    def _record_trade(self, trade: Dict, position: Optional[Dict]):
+        """Keep a trade in memory, the journal and the trade store (execution actor only)"""
+        self.trade_history.append(trade)
+        self.trade_count += 1
+        self._journal({"type": "trade", "trade": trade, "position": position})
+        if self.trade_store:
+            self.trade_store.record_trade(self.store_id, trade)
+            self._trim_history()
+
+    def _fill_reasoning(self, trades: List[Dict], reasoning: str):
+        """Fill in reasoning for trades made before it arrived, wherever they're recorded (execution actor only)"""
+        for trade in trades:
+            if trade["reasoning"]:
+                continue
+            trade["reasoning"] = reasoning
+            self._journal({"type": "reasoning", "timestamp": trade["timestamp"], "symbol": trade["symbol"], "reasoning": reasoning})
+            if self.trade_store:
+                self.trade_store.update_reasoning(self.store_id, trade["timestamp"], trade["symbol"], reasoning)
+
+    def _record_decision(self, decision: Dict):
+        self._journal({"type": "decision", **decision})
+        if self.trade_store:
+            self.trade_store.record_decision(self.store_id, decision)
+
+    def _trim_history(self):
+        """Drop the oldest in-memory trades (the store has them all) - in chunks, so it's O(1) per trade"""
+        if len(self.trade_history) > self.history_limit + self.history_limit // 4:
+            del self.trade_history[:len(self.trade_history) - self.history_limit]
+
+    def valuation_snapshot(self, priority: int = PRIORITY_HELD) -> Dict:
+        """Value cash and holdings against one snapshot of mark prices
+
+        Pass PRIORITY_CHART for display-only valuations: those never wait on the Alpha
+        Vantage budget and take cached or Yahoo quotes instead.
+        """
+        quotes = MarketDataService.get_quotes(list(self.portfolio.keys()), priority)
+        # Quotes are fetched concurrently; the account is read between trades
+        return self.execution.call(self._valuation, quotes)
+
+    async def valuation_snapshot_async(self, market_data_service) -> Dict:
+        """valuation_snapshot with quotes from an AsyncMarketDataService"""
+        quotes = await market_data_service.get_quotes(list(self.portfolio.keys()))
+        return await asyncio.wrap_future(self.execution.submit(self._valuation, quotes))
+
+    def _valuation(self, quotes: Dict[str, Dict]) -> Dict:
+        holdings_value = 0
+        holdings_detail = []
+        for symbol, holding in self.portfolio.items():
+            # No quote (fetch failed, or bought after the quotes were taken): mark at cost
+            quote = quotes.get(symbol)
+            price = quote["price"] if quote else holding["avg_price"]
 
-        return decision
+            current_value = holding["quantity"] * price
+            holdings_value += current_value
+            cost_basis = holding["quantity"] * holding["avg_price"]
+            pnl = current_value - cost_basis
+            pnl_pct = (pnl / cost_basis) * 100 if cost_basis > 0 else 0
+
+            holdings_detail.append({
+                "symbol": symbol,
+                "quantity": holding["quantity"],
+                "avg_price": holding["avg_price"],
+                "current_price": price,
+                "quoted": bool(quote),
+                "current_value": current_value,
+                "cost_basis": cost_basis,
+                "pnl": pnl,
+                "pnl_pct": pnl_pct
+            })
+
+        return {
+            "cash": self.balance,
+            "holdings_value": holdings_value,
+            "total_portfolio_value": self.balance + holdings_value,
+            "holdings": holdings_detail
+        }
 
     def calculate_portfolio_value(self) -> float:
         """Calculate total portfolio value (cash + holdings)"""
-        total_value = self.balance
+        return self.valuation_snapshot()["total_portfolio_value"]
 
-        for symbol, holding in self.portfolio.items():
-            market_data = self.get_market_data(symbol, period="1d")
-            if market_data:
-                total_value += holding["quantity"] * market_data["current_price"]
+    def get_performance_stats(self, priority: int = PRIORITY_HELD) -> Dict:
+        """Get performance statistics (priority as for valuation_snapshot)"""
+        return self._performance_stats(self.valuation_snapshot(priority))
 
-        return total_value
+    async def get_performance_stats_async(self, market_data_service) -> Dict:
+        """get_performance_stats with quotes from an AsyncMarketDataService"""
+        return self._performance_stats(await self.valuation_snapshot_async(market_data_service))
 
-    def get_performance_stats(self) -> Dict:
-        """Get performance statistics"""
-        portfolio_value = self.calculate_portfolio_value()
+    def _performance_stats(self, snapshot: Dict) -> Dict:
+        portfolio_value = snapshot["total_portfolio_value"]
         total_return = portfolio_value - self.initial_balance
         return_pct = (total_return / self.initial_balance) * 100
 
-        # Calculate holdings value
-        holdings_value = 0
-        holdings_detail = []
-        for symbol, holding in self.portfolio.items():
-            market_data = self.get_market_data(symbol, period="1d")
-            if market_data:
-                current_value = holding["quantity"] * market_data["current_price"]
-                holdings_value += current_value
-                cost_basis = holding["quantity"] * holding["avg_price"]
-                pnl = current_value - cost_basis
-                pnl_pct = (pnl / cost_basis) * 100 if cost_basis > 0 else 0
-
-                holdings_detail.append({
-                    "symbol": symbol,
-                    "quantity": holding["quantity"],
-                    "avg_price": holding["avg_price"],
-                    "current_price": market_data["current_price"],
-                    "current_value": current_value,
-                    "cost_basis": cost_basis,
-                    "pnl": pnl,
-                    "pnl_pct": pnl_pct
-                })
-
         return {
             "initial_balance": self.initial_balance,
-            "current_balance": self.balance,
-            "holdings_value": holdings_value,
+            "current_balance": snapshot["cash"],
+            "holdings_value": snapshot["holdings_value"],
             "total_portfolio_value": portfolio_value,
             "total_return": total_return,
             "return_percentage": return_pct,
-            "total_trades": len(self.trade_history),
-            "holdings": holdings_detail
+            "total_trades": self.trade_count,
+            "holdings": snapshot["holdings"]
+        }
+
+    def llm_stats(self) -> Dict:
+        """LLM call and execution queue accounting"""
+        return {
+            "decision_cache": self.decision_cache.stats(),
+            "retries": self.retry_policy.stats(),
+            "tokens": self.token_meter.stats(),
+            "execution": self.execution.stats()
         }
 
     def save_state(self, filename: str = "agent_state.json"):
         """Save agent state to file"""
-        state = {
+        self.execution.call(self._save_state, filename)
+
+    def load_state(self, filename: str = "agent_state.json"):
+        """Load agent state from file"""
+        self.execution.call(self._load_state, filename)
+
+    def attach_journal(self, journal: TradeJournal) -> bool:
+        """Record every trade and decision in journal from now on
+
+        If the journal already holds state (an earlier or crashed session), the agent is
+        restored from it and True is returned; otherwise it starts from the current state.
+        """
+        return self.execution.call(self._attach_journal, journal)
+
+    def attach_trade_store(self, store: TradeStore, agent_id: str):
+        """Record trades and decisions in store under agent_id and keep only recent trades in memory
+
+        If the store has no trades for agent_id yet, the in-memory history is copied in first.
+        """
+        self.execution.call(self._attach_trade_store, store, agent_id)
+
+    def _attach_trade_store(self, store: TradeStore, agent_id: str):
+        if self.trade_history and store.count_trades(agent_id) == 0:
+            store.record_trades(agent_id, self.trade_history)
+        self.trade_store = store
+        self.store_id = agent_id
+        self._trim_history()
+
+    def close_journal(self):
+        """Snapshot and close the journal, if any"""
+        self.execution.call(self._close_journal)
+
+    def _attach_journal(self, journal: TradeJournal) -> bool:
+        state = journal.replay()
+        if state is not None:
+            self._restore(state)
+        else:
+            journal.snapshot(self._state())
+        self.journal = journal
+        return state is not None
+
+    def _close_journal(self):
+        if self.journal:
+            self.journal.snapshot(self._state())
+            self.journal.close()
+            self.journal = None
+
+    def _journal(self, record: Dict):
+        """Append to the journal, compacting it when a snapshot is due (execution actor only)"""
+        if self.journal and self.journal.append(record):
+            self.journal.snapshot(self._state())
+
+    def _state(self) -> Dict:
+        return {
             "name": self.name,
             "initial_balance": self.initial_balance,
             "balance": self.balance,
             "portfolio": self.portfolio,
             "trade_history": self.trade_history,
+            "trade_count": self.trade_count,
             "performance_history": self.performance_history
         }
+
+    def _restore(self, state: Dict):
+        self.name = state["name"]
+        self.initial_balance = state["initial_balance"]
+        self.balance = state["balance"]
+        self.portfolio = state["portfolio"]
+        self.trade_history = state["trade_history"]
+        self.trade_count = state.get("trade_count", len(self.trade_history))
+        self.performance_history = state.get("performance_history", [])
+
+    def _save_state(self, filename: str):
         with open(filename, 'w') as f:
-            json.dump(state, f, indent=2)
+            json.dump(self._state(), f, separators=(",", ":"))
         print(f"💾 State saved to {filename}")
 
-    def load_state(self, filename: str = "agent_state.json"):
-        """Load agent state from file"""
+    def _load_state(self, filename: str):
         try:
             with open(filename, 'r') as f:
-                state = json.load(f)
-            self.name = state["name"]
-            self.initial_balance = state["initial_balance"]
-            self.balance = state["balance"]
-            self.portfolio = state["portfolio"]
-            self.trade_history = state["trade_history"]
-            self.performance_history = state.get("performance_history", [])
+                self._restore(json.load(f))
+            if self.trade_store:
+                # State files only hold the in-memory tail once a store is attached, so the
+                # store keeps its rows; it's only seeded when it has none for this agent yet
+                if self.trade_history and self.trade_store.count_trades(self.store_id) == 0:
+                    self.trade_store.record_trades(self.store_id, self.trade_history)
+                self._trim_history()
+            if self.journal:
+                self.journal.snapshot(self._state())
             print(f"📂 State loaded from {filename}")
         except FileNotFoundError:
             print(f"⚠️ No saved state found at {filename}")